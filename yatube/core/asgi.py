@@ -0,0 +1,180 @@
+import asyncio
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from django.conf import settings
+
+# Тело запроса больше этого порога уходит из памяти во временный файл
+MAX_MEMORY_BODY = 2 * 1024 * 1024
+# Сколько частей ответа поток может прочитать вперёд медленного клиента
+STREAM_BUFFER = 8
+# Как часто поток, ждущий места в очереди, проверяет отключение клиента
+STOP_POLL = 0.5
+
+
+def build_environ(scope, body):
+    """Переводит HTTP-scope ASGI в окружение WSGI (PEP 3333)."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': str(client[0]),
+        'SERVER_PROTOCOL': 'HTTP/%s' % scope.get('http_version', '1.1'),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        if name in environ:
+            value = environ[name] + ',' + value
+        environ[name] = value
+    return environ
+
+
+class AsgiBridge:
+    """ASGI-приложение поверх WSGI-приложения Django.
+
+    Django 2.2 не умеет асинхронные представления, поэтому обычные
+    запросы выполняются в ограниченном пуле потоков: поток занят, пока
+    ответ не прочитан целиком. Пути из routes (долгие соединения SSE)
+    обслуживаются корутинами напрямую, минуя пул.
+    """
+
+    def __init__(self, wsgi_application, routes=None, max_workers=None):
+        self.wsgi_application = wsgi_application
+        self.routes = routes or {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.ASGI_THREADS,
+            thread_name_prefix='asgi',
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип {scope["type"]}')
+        handler = self.routes.get(scope['path'])
+        if handler is not None:
+            return await handler(scope, receive, send, self.executor)
+        return await self.handle_wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        body = tempfile.SpooledTemporaryFile(max_size=MAX_MEMORY_BODY)
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        body.seek(0)
+        return body
+
+    def call_wsgi(self, environ):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ]
+
+        iterable = self.wsgi_application(environ, start_response)
+        return response, iterable
+
+    @staticmethod
+    def _put(loop, queue, item, stop):
+        """Кладёт item в очередь цикла событий; False - клиент ушёл."""
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while not stop.is_set():
+            try:
+                future.result(timeout=STOP_POLL)
+                return True
+            except FutureTimeout:
+                continue
+        future.cancel()
+        return False
+
+    def run_wsgi(self, environ, loop, queue, stop):
+        """Вызывает приложение и читает тело ответа в одном потоке.
+
+        Ленивые итераторы тела (курсоры базы в потоковом экспорте)
+        привязаны к соединению потока, поэтому весь ответ от вызова
+        до close() читается там же. В конце в очередь кладётся None.
+        """
+        try:
+            response, iterable = self.call_wsgi(environ)
+            try:
+                if not self._put(loop, queue, response, stop):
+                    return
+                for chunk in iterable:
+                    if chunk and not self._put(loop, queue, chunk, stop):
+                        return
+            finally:
+                if hasattr(iterable, 'close'):
+                    iterable.close()
+        finally:
+            self._put(loop, queue, None, stop)
+
+    async def handle_wsgi(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue(maxsize=STREAM_BUFFER)
+        stop = threading.Event()
+        producer = loop.run_in_executor(
+            self.executor, self.run_wsgi,
+            build_environ(scope, body), loop, queue, stop,
+        )
+        try:
+            response = await queue.get()
+            if response is not None:
+                await send({
+                    'type': 'http.response.start',
+                    'status': response['status'],
+                    'headers': response['headers'],
+                })
+                chunk = await queue.get()
+                while chunk is not None:
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+                    chunk = await queue.get()
+                await send({'type': 'http.response.body'})
+        finally:
+            stop.set()
+            await asyncio.wait([producer])
+            body.close()
+        # ошибка приложения до начала ответа
+        producer.result()
@@ -0,0 +1,87 @@
+import gzip
+import hashlib
+import re
+import zlib
+
+from django.core.cache import cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/x-ndjson',
+    'image/svg+xml',
+)
+# События должны уходить клиенту сразу, а не копиться в буфере компрессора
+SKIPPED_TYPES = ('text/event-stream',)
+# Уровни для ответов на лету; статика сжимается заранее и сильнее
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Сжатое тело ищется по хэшу содержимого, так что устареть оно не может
+COMPRESSED_TIMEOUT = 5 * 60
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        if re.match(r'\s*q=0(\.0*)?\s*$', params):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compressible(response, min_size):
+    if response.has_header('Content-Encoding'):
+        return False
+    content_type = response.get('Content-Type', '').lower()
+    if (content_type.startswith(SKIPPED_TYPES)
+            or not content_type.startswith(COMPRESSIBLE_TYPES)):
+        return False
+    return response.streaming or len(response.content) >= min_size
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, GZIP_LEVEL, mtime=0)
+
+
+def cached_compress(data, encoding):
+    key = f'compressed:{encoding}:{hashlib.md5(data).hexdigest()}'
+    body = cache.get(key)
+    if body is None:
+        body = compress(data, encoding)
+        cache.set(key, body, COMPRESSED_TIMEOUT)
+    return body
+
+
+def compress_stream(chunks, encoding):
+    """Сжимает поток по мере чтения, не собирая его в памяти."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        step, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        step, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = step(chunk)
+        if data:
+            yield data
+    yield finish()
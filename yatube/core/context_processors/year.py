@@ -1,7 +1,11 @@
 import datetime as dt
 
+from django.utils.functional import SimpleLazyObject
+
 
 def year(request):
-    """Добавляет переменную с текущим годом."""
-    now = dt.datetime.now()
-    return {'year': now.year}
+    """Добавляет переменную с текущим годом.
+
+    Год считается, только если шаблон его выводит.
+    """
+    return {'year': SimpleLazyObject(lambda: dt.datetime.now().year)}
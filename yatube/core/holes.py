@@ -0,0 +1,85 @@
+import hashlib
+import json
+import re
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+_HOLE = re.compile(r'<!--hole:([\w=-]+)-->')
+
+
+def shared_page(timeout, version):
+    """Страница одна на всех: в кэше хранится HTML с «дырами» на месте
+    личных фрагментов {% hole %}, они заполняются на каждый запрос.
+
+    version(request, *args, **kwargs) - данные, от которых зависит
+    страница; они входят в ключ, так что изменения видны сразу, а timeout
+    только ограничивает жизнь копии. None - страницу не кэшировать.
+    Работает при SHARED_PAGE_CACHE. Декоратор, а не middleware, чтобы
+    условные ответы (304) снаружи него срабатывали раньше кэша.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (not settings.SHARED_PAGE_CACHE
+                    or request.method not in ('GET', 'HEAD')):
+                return view(request, *args, **kwargs)
+            page_version = version(request, *args, **kwargs)
+            if page_version is None:
+                return view(request, *args, **kwargs)
+            key = page_key(request, page_version)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(
+                    fill(content, request), content_type=content_type
+                )
+                response.shared_page = True
+                return response
+            request.punch_holes = True
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                request.punch_holes = False
+            if not _cacheable(request, response):
+                return response
+            content = response.content.decode(response.charset)
+            cache.set(key, (content, response['Content-Type']), timeout)
+            response.content = fill(content, request)
+            response.shared_page = True
+            return response
+        return wrapper
+    return decorator
+
+
+def _cacheable(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        # страница с csrf-токеном у каждого своя
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def page_key(request, version=None):
+    data = repr((request.build_absolute_uri(), version)).encode()
+    return f'shared-page:{hashlib.md5(data).hexdigest()}'
+
+
+def placeholder(template_name, values):
+    data = json.dumps([template_name, values], cls=DjangoJSONEncoder)
+    return f'<!--hole:{urlsafe_b64encode(data.encode()).decode()}-->'
+
+
+def fill(content, request):
+    """Рендерит фрагменты на месте дыр в контексте текущего запроса."""
+    def render(match):
+        template_name, values = json.loads(urlsafe_b64decode(match.group(1)))
+        return render_to_string(template_name, values, request)
+    return _HOLE.sub(render, content)
@@ -0,0 +1,37 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.pool import worker_pool
+from core.tasks import recover, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи из очереди core.Task в пуле процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count(),
+            help='Сколько процессов выполняют задачи.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        with worker_pool(options['processes']) as executor:
+            while True:
+                recover()
+                done = run_pending(executor, limit=options['processes'] * 4)
+                if done:
+                    self.stdout.write(f'Выполнено задач: {done}')
+                if options['once']:
+                    return
+                if not done:
+                    time.sleep(options['interval'])
@@ -0,0 +1,150 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.messages.storage import default_storage
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject, empty
+
+from . import compression, templating
+
+logger = logging.getLogger(__name__)
+
+
+def anonymous_read(request):
+    """GET/HEAD без cookie сессии и сообщений: ни пользователя, ни
+    сообщений у такого запроса быть не может."""
+    if not hasattr(request, '_anonymous_read'):
+        request._anonymous_read = (
+            request.method in ('GET', 'HEAD')
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and CookieStorage.cookie_name not in request.COOKIES
+        )
+    return request._anonymous_read
+
+
+def _evaluated(lazy):
+    return getattr(lazy, '_wrapped', None) is not empty
+
+
+class LazySessionMiddleware(SessionMiddleware):
+    """Для анонимного чтения сессия создаётся, только если её тронули."""
+
+    def process_request(self, request):
+        if not anonymous_read(request):
+            return super().process_request(request)
+        request.session = SimpleLazyObject(lambda: self.SessionStore(None))
+
+    def process_response(self, request, response):
+        if anonymous_read(request) and not _evaluated(request.session):
+            # страница с cookie сессии будет другой (шапка, формы),
+            # общий и браузерный кэш должны хранить их раздельно
+            if response.get('Content-Type', '').startswith('text/html'):
+                patch_vary_headers(response, ('Cookie',))
+            return response
+        return super().process_response(request, response)
+
+
+class LazyAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        if not anonymous_read(request):
+            return super().process_request(request)
+        # без cookie сессии пользователь заведомо аноним
+        request.user = AnonymousUser()
+
+
+class LazyMessageMiddleware(MessageMiddleware):
+    def process_request(self, request):
+        if not anonymous_read(request):
+            return super().process_request(request)
+        request._messages = SimpleLazyObject(lambda: default_storage(request))
+
+    def process_response(self, request, response):
+        if anonymous_read(request) and not _evaluated(request._messages):
+            return response
+        return super().process_response(request, response)
+
+
+class TemplateProfilingMiddleware:
+    """Замеряет рендер каждого шаблона и include при TEMPLATE_PROFILING.
+
+    Итог пишется в лог core.middleware и в заголовок Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TEMPLATE_PROFILING:
+            raise MiddlewareNotUsed
+        templating.install_profiler()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        templating.start_profiling()
+        try:
+            response = self.get_response(request)
+        finally:
+            stats = templating.stop_profiling()
+        ordered = sorted(
+            stats.items(), key=lambda item: item[1][1], reverse=True
+        )
+        for name, (calls, total, own) in ordered:
+            logger.info(
+                '%s %s: %d раз, всего %.2f мс, собственное %.2f мс',
+                request.path, name, calls, total * 1000, own * 1000,
+            )
+        if ordered:
+            response['Server-Timing'] = ', '.join(
+                f'tpl{index};desc="{name}";dur={total * 1000:.2f}'
+                for index, (name, (_, total, _)) in enumerate(ordered)
+            )
+        return response
+
+
+class CompressionMiddleware:
+    """Сжимает ответы brotli или gzip по Accept-Encoding.
+
+    Маленькие, уже сжатые и несжимаемые ответы не трогает, потоковые
+    сжимает по частям. Общие страницы (holes.shared_page) у анонимов
+    одинаковы, их сжатое тело берётся из кэша по хэшу содержимого.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not compression.compressible(
+            response, settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            if (getattr(response, 'shared_page', False)
+                    and not request.user.is_authenticated):
+                body = compression.cached_compress(response.content, encoding)
+            else:
+                body = compression.compress(response.content, encoding)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # сжатое представление не совпадает побайтно с исходным
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
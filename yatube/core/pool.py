@@ -0,0 +1,22 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import django
+
+# Модуль не импортирует моделей: его setup_worker выполняется в новом
+# процессе раньше, чем загружены приложения Django.
+
+
+def setup_worker():
+    django.setup()
+
+
+def worker_pool(processes):
+    """Пул для core.tasks.run_pending.
+
+    Процессы запускаются через spawn, а не fork: соединения с базой,
+    открытые родителем, им не достаются.
+    """
+    return ProcessPoolExecutor(
+        processes, mp_context=get_context('spawn'), initializer=setup_worker
+    )
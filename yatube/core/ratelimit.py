@@ -0,0 +1,104 @@
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def _identities(request, keys):
+    if 'user' in keys and request.user.is_authenticated:
+        yield f'user:{request.user.pk}'
+    if 'ip' in keys:
+        yield f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def _window(name, identity, period, now):
+    window = int(now // period)
+    return (
+        f'ratelimit:{name}:{identity}:{window}',
+        f'ratelimit:{name}:{identity}:{window - 1}',
+        now / period - window,
+    )
+
+
+def _incr(key, period):
+    # счётчик живёт два интервала: следующий использует его как предыдущий
+    if cache.add(key, 1, 2 * period):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, 2 * period)
+        return 1
+
+
+def hit(name, identity, limit, period, now=None):
+    """Учитывает запрос: (разрешён ли, через сколько секунд повторить).
+
+    Сначала incr, потом сравнение с лимитом: из одновременных запросов
+    пройдут не больше limit. Отказ свой учёт отменяет. Окно - два
+    счётчика соседних интервалов: предыдущий берётся с весом оставшейся
+    в окне доли, так что проверка стоит O(1) обращений к кэшу.
+    """
+    now = time.time() if now is None else now
+    current, previous, elapsed = _window(name, identity, period, now)
+    value = _incr(current, period)
+    estimate = cache.get(previous, 0) * (1 - elapsed) + value
+    if estimate > limit:
+        undo(name, identity, period, now)
+        return False, int((1 - elapsed) * period) + 1
+    return True, 0
+
+
+def undo(name, identity, period, now):
+    current, _, _ = _window(name, identity, period, now)
+    try:
+        cache.decr(current)
+    except ValueError:
+        pass
+
+
+def ratelimit(rate, keys=('user',), methods=('POST',), name=None):
+    """Ограничивает частоту запросов к view по ключам keys.
+
+    'user' - для view с login_required, 'ip' - для анонимных: за прокси
+    у всех пользователей один REMOTE_ADDR и общий на всех лимит.
+    Сверх лимита отвечает 429 до того, как view обратится к базе.
+    Запрос учитывается, только если его пропустили все ограничения:
+    отказ по IP не расходует лимит пользователя.
+    """
+    limit, period = parse_rate(rate)
+
+    def decorator(view):
+        group = name or f'{view.__module__}.{view.__qualname__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                now = time.time()
+                counted = []
+                for identity in _identities(request, keys):
+                    allowed, retry_after = hit(
+                        group, identity, limit, period, now
+                    )
+                    if not allowed:
+                        for other in counted:
+                            undo(group, other, period, now)
+                        response = render(
+                            request, 'core/429.html',
+                            {'retry_after': retry_after}, status=429,
+                        )
+                        response['Retry-After'] = str(retry_after)
+                        return response
+                    counted.append(identity)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,231 @@
+import gzip
+import mimetypes
+import os
+import posixpath
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (ManifestStaticFilesStorage,
+                                                staticfiles_storage)
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .compression import accepted_encodings, brotli
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.json', '.txt', '.map')
+# Меньше этого размера заголовки съедят выигрыш от сжатия
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE = 'public, max-age=31536000, immutable'
+SHORT_CACHE = 'public, max-age=300'
+
+_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_LICENSE = re.compile(r'/\*!.*?\*/', re.S)
+_TOKEN = re.compile(r'[A-Za-z_][\w-]*')
+_CLASS = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+_IGNORED = re.compile(r'\[[^\]]*\]|:not\([^)]*\)')
+# at-правила, внутри которых обычные правила и их тоже можно чистить
+_NESTED = ('media', 'supports')
+
+
+def _skip(css, pos, stops):
+    """Позиция первого символа из stops вне строк и комментариев."""
+    while pos < len(css):
+        char = css[pos]
+        if char in '"\'':
+            pos += 1
+            while pos < len(css) and css[pos] != char:
+                pos += 2 if css[pos] == '\\' else 1
+        elif css.startswith('/*', pos):
+            end = css.find('*/', pos + 2)
+            pos = len(css) if end < 0 else end + 1
+        elif char in stops:
+            return pos
+        pos += 1
+    return pos
+
+
+def _rules(css):
+    """(заголовок, тело) правил верхнего уровня; у @charset тело None."""
+    pos = 0
+    while pos < len(css):
+        stop = _skip(css, pos, '{;}')
+        if stop >= len(css):
+            return
+        if css[stop] != '{':
+            yield css[pos:stop], None
+            pos = stop + 1
+            continue
+        depth, end = 1, stop
+        while depth and end < len(css):
+            end = _skip(css, end + 1, '{}')
+            depth += 1 if end < len(css) and css[end] == '{' else -1
+        yield css[pos:stop], css[stop + 1:end]
+        pos = end + 1
+
+
+def _selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for index, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and not depth:
+            selectors.append(prelude[start:index])
+            start = index + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def _used(selector, used):
+    return set(_CLASS.findall(_IGNORED.sub('', selector))) <= used
+
+
+def purge_css(css, used):
+    """Оставляет правила, все классы селектора которых есть в used."""
+    output = []
+    for prelude, body in _rules(css):
+        output.extend(_LICENSE.findall(prelude))
+        prelude = _COMMENT.sub('', prelude).strip()
+        if not prelude:
+            continue
+        if body is None:
+            output.append(prelude + ';')
+        elif prelude.startswith('@'):
+            name = _TOKEN.match(prelude[1:])
+            if name and name.group().lower() in _NESTED:
+                body = purge_css(body, used)
+                if not body:
+                    continue
+            output.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [
+                selector.strip() for selector in _selectors(prelude)
+                if _used(selector, used)
+            ]
+            if selectors:
+                output.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(output)
+
+
+def template_tokens():
+    """Все слова из шаблонов проекта: классы в них встречаются и в
+    атрибутах class, и в аргументах фильтров вроде addclass."""
+    directories = list(engines['django'].engine.dirs)
+    directories += [
+        directory for directory in get_app_template_dirs('templates')
+        if directory.startswith(settings.BASE_DIR)
+    ]
+    tokens = set()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.html'):
+                    with open(os.path.join(root, filename)) as template:
+                        tokens.update(_TOKEN.findall(template.read()))
+    return tokens
+
+
+def compress(content):
+    """{суффикс: сжатое содержимое} для тех кодировок, что дают выигрыш."""
+    variants = {'.gz': gzip.compress(content, 9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content)
+    return {
+        suffix: data for suffix, data in variants.items()
+        if len(data) < len(content)
+    }
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Хэш в именах, CSS без лишних классов и .gz/.br рядом с файлами.
+
+    Всё делается в collectstatic, на запросах работает только serve.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+        paths = dict(paths)
+        self._purge(paths)
+        yield from super().post_process(paths, dry_run, **options)
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            for compressed in self._compress(name):
+                yield name, compressed, True
+
+    def _purge(self, paths):
+        purge = [name for name in settings.STATIC_PURGE_CSS if name in paths]
+        if not purge:
+            return
+        used = template_tokens()
+        for name in purge:
+            storage, path = paths[name]
+            with storage.open(path) as source:
+                css = source.read().decode()
+            self.delete(name)
+            self._save(name, ContentFile(purge_css(css, used).encode()))
+            # хэш считается уже по очищенному файлу
+            paths[name] = (self, name)
+
+    def _compress(self, name):
+        if not name.endswith(COMPRESSIBLE) or not self.exists(name):
+            return
+        with self.open(name) as source:
+            content = source.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, data in compress(content).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            yield self._save(name + suffix, ContentFile(data))
+
+
+@lru_cache(maxsize=None)
+def _hashed_names():
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def serve(request, path):
+    """Отдаёт файл из STATIC_ROOT, выбирая сжатую копию по Accept-Encoding.
+
+    Имена с хэшем из манифеста кэшируются навсегда: при изменении файла
+    меняется и имя.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    stat = os.stat(fullpath)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime, stat.st_size
+    ):
+        return HttpResponseNotModified()
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    encoding = None
+    for coding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if coding in accepted and os.path.isfile(fullpath + suffix):
+            fullpath += suffix
+            encoding = coding
+            break
+    response = FileResponse(open(fullpath, 'rb'))
+    content_type, _ = mimetypes.guess_type(path)
+    response['Content-Type'] = content_type or 'application/octet-stream'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = (
+        IMMUTABLE if path in _hashed_names() else SHORT_CACHE
+    )
+    return response
@@ -0,0 +1,190 @@
+import json
+import logging
+import traceback
+from concurrent.futures import wait
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+# Повтор после ошибки: RETRY_DELAY * 2 ** (попытка - 1) секунд
+RETRY_DELAY = 10
+# Пока задача выполняется в пуле, worker раз в HEARTBEAT обновляет её
+# started. Задача без обновлений дольше STALE_AFTER брошена упавшим
+# worker: recover вернёт её в очередь, считая это попыткой. Ограничения
+# времени нет, но задача, выполняемая без пула (run_pending без
+# executor), обязана укладываться в STALE_AFTER - иначе её повторят.
+HEARTBEAT = timedelta(minutes=1)
+STALE_AFTER = timedelta(minutes=10)
+# Сколько хранятся выполненные задачи: ключи идемпотентности живут с ними
+KEEP_DONE = timedelta(days=1)
+
+
+def task(func=None, *, priority=0, max_attempts=3):
+    """Регистрирует функцию как задачу и добавляет ей delay().
+
+    func.delay(*args, key=..., priority=..., run_at=..., **kwargs) ставит
+    вызов в очередь; аргументы должны сериализоваться в JSON.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+        REGISTRY[name] = func
+
+        def delay(*args, key=None, priority=priority, run_at=None, **kwargs):
+            return enqueue(
+                name, args, kwargs, key=key, priority=priority,
+                max_attempts=max_attempts, run_at=run_at,
+            )
+        func.delay = delay
+        func.task_name = name
+        return func
+    return decorator if func is None else decorator(func)
+
+
+def enqueue(name, args=(), kwargs=None, key=None, priority=0,
+            max_attempts=3, run_at=None):
+    """Ставит задачу в очередь; с тем же key - возвращает уже созданную.
+
+    При TASKS_EAGER задача выполняется сразу, без очереди.
+    """
+    if settings.TASKS_EAGER:
+        _call(name, list(args), kwargs or {})
+        return None
+    fields = {
+        'name': name,
+        'arguments': json.dumps([list(args), kwargs or {}]),
+        'priority': priority,
+        'max_attempts': max_attempts,
+        'run_at': run_at or timezone.now(),
+    }
+    if key is None:
+        return Task.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Task.objects.create(key=key, **fields)
+    except IntegrityError:
+        return Task.objects.get(key=key)
+
+
+def _call(name, args, kwargs):
+    if name not in REGISTRY:
+        # в процессе пула модуль с задачей мог ещё не импортироваться
+        import_module(name.rsplit('.', 1)[0])
+    return REGISTRY[name](*args, **kwargs)
+
+
+def execute(name, arguments):
+    """Выполняет задачу; запускается в процессе пула."""
+    close_old_connections()
+    try:
+        args, kwargs = json.loads(arguments)
+        _call(name, args, kwargs)
+    finally:
+        close_old_connections()
+
+
+def claim(limit):
+    """Забирает до limit готовых задач: сначала приоритетные и старые.
+
+    UPDATE с условием на статус не даёт двум worker взять одну задачу.
+    """
+    now = timezone.now()
+    candidates = Task.objects.filter(
+        status=Task.QUEUED, run_at__lte=now
+    ).order_by('-priority', 'run_at', 'pk').values_list('pk', flat=True)
+    claimed = []
+    for pk in candidates[:limit]:
+        updated = Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING, started=now
+        )
+        if updated:
+            claimed.append(pk)
+    return list(Task.objects.filter(pk__in=claimed).order_by(
+        '-priority', 'run_at', 'pk'
+    ))
+
+
+def finish(task, error=None):
+    task.attempts += 1
+    if error is None:
+        task.status = Task.DONE
+        task.error = ''
+    elif task.attempts < task.max_attempts:
+        task.status = Task.QUEUED
+        task.error = error
+        task.run_at = timezone.now() + timedelta(
+            seconds=RETRY_DELAY * 2 ** (task.attempts - 1)
+        )
+    else:
+        task.status = Task.FAILED
+        task.error = error
+        logger.error('Задача %s не выполнена: %s', task, error)
+    task.save(update_fields=['status', 'attempts', 'error', 'run_at'])
+
+
+def run_pending(executor=None, limit=100):
+    """Выполняет готовые задачи; возвращает их число.
+
+    Без executor задачи выполняются в текущем процессе по очереди.
+    """
+    tasks = claim(limit)
+    if executor is None:
+        for task in tasks:
+            try:
+                execute(task.name, task.arguments)
+            except Exception:
+                finish(task, traceback.format_exc())
+            else:
+                finish(task)
+        return len(tasks)
+    futures = {
+        executor.submit(execute, task.name, task.arguments): task
+        for task in tasks
+    }
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, HEARTBEAT.total_seconds())
+        for future in done:
+            try:
+                future.result()
+            except Exception:
+                finish(futures[future], traceback.format_exc())
+            else:
+                finish(futures[future])
+        if pending:
+            # живой worker продлевает свои задачи: recover их не тронет
+            Task.objects.filter(
+                pk__in=[futures[future].pk for future in pending]
+            ).update(started=timezone.now())
+    return len(tasks)
+
+
+def recover(now=None):
+    """Возвращает в очередь брошенные задачи и удаляет старые выполненные.
+
+    Брошенная задача считается неудачной попыткой: задача, которая
+    роняет worker, не будет повторяться бесконечно.
+    """
+    now = now or timezone.now()
+    stale = Task.objects.filter(
+        status=Task.RUNNING, started__lt=now - STALE_AFTER
+    )
+    error = 'Worker не завершил задачу.'
+    failed = stale.filter(attempts__gte=F('max_attempts') - 1).update(
+        status=Task.FAILED, attempts=F('attempts') + 1, error=error
+    )
+    if failed:
+        logger.error('Брошенных задач не выполнено: %d', failed)
+    requeued = stale.update(
+        status=Task.QUEUED, attempts=F('attempts') + 1, error=error
+    )
+    Task.objects.filter(status=Task.DONE, run_at__lt=now - KEEP_DONE).delete()
+    return requeued
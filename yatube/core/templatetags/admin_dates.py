@@ -0,0 +1,81 @@
+import copy
+from datetime import date, datetime, time, timedelta
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.utils import timezone
+
+register = template.Library()
+
+
+def _next(start, kind):
+    if kind == 'year':
+        return date(start.year + 1, 1, 1)
+    if kind == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+class IndexedDates:
+    """Выборка changelist для тега date_hierarchy без проходов по таблице.
+
+    Тег берёт у выборки Min и Max даты и dates() - SELECT DISTINCT по всем
+    строкам. Здесь границы - два запроса по индексу, а годы, месяцы и дни -
+    EXISTS по диапазону на каждый. Поле - DateTimeField.
+    """
+
+    def __init__(self, queryset, field_name):
+        self.queryset = queryset
+        self.field_name = field_name
+
+    def _edge(self, order):
+        return self.queryset.order_by(order).values_list(
+            self.field_name, flat=True
+        ).first()
+
+    def aggregate(self, **kwargs):
+        # тег спрашивает только first=Min(поле) и last=Max(поле)
+        first = self._edge(self.field_name)
+        if first is None:
+            return {'first': None, 'last': None}
+        return {'first': first, 'last': self._edge('-' + self.field_name)}
+
+    def _exists(self, start, end):
+        start, end = (
+            timezone.make_aware(datetime.combine(day, time()))
+            for day in (start, end)
+        )
+        return self.queryset.filter(**{
+            f'{self.field_name}__gte': start,
+            f'{self.field_name}__lt': end,
+        }).exists()
+
+    def dates(self, field_name, kind):
+        bounds = self.aggregate()
+        if bounds['first'] is None:
+            return []
+        first, last = (
+            timezone.localtime(bounds[edge]).date()
+            for edge in ('first', 'last')
+        )
+        if kind == 'year':
+            start = first.replace(month=1, day=1)
+        elif kind == 'month':
+            start = first.replace(day=1)
+        else:
+            start = first
+        periods = []
+        while start <= last:
+            end = _next(start, kind)
+            if self._exists(start, end):
+                periods.append(start)
+            start = end
+        return periods
+
+
+@register.inclusion_tag('admin/date_hierarchy.html')
+def indexed_date_hierarchy(cl):
+    """Тег date_hierarchy из django.contrib.admin с запросами по индексу."""
+    cl = copy.copy(cl)
+    cl.queryset = IndexedDates(cl.queryset, cl.date_hierarchy)
+    return date_hierarchy(cl)
@@ -0,0 +1,21 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from .. import holes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **values):
+    """Как include, но в общей странице оставляет место под фрагмент.
+
+    Фрагмент получает только values и контекст-процессоры запроса.
+    """
+    request = context.get('request')
+    if getattr(request, 'punch_holes', False):
+        return mark_safe(holes.placeholder(template_name, values))
+    with context.push(**values):
+        return context.template.engine.get_template(
+            template_name
+        ).render(context)
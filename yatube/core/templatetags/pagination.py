@@ -0,0 +1,31 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page_obj, around=2):
+    """Номера страниц вокруг текущей: первая, последняя и ±around.
+
+    None на месте пропуска выводится как многоточие. Длина окна не
+    зависит от числа страниц: paginator.page_range не перебирается.
+    """
+    number = page_obj.number
+    last = page_obj.paginator.num_pages
+    start = max(number - around, 1)
+    end = min(number + around, last)
+    pages = []
+    if start > 1:
+        pages.append(1)
+        if start > 3:
+            pages.append(None)
+        elif start == 3:
+            pages.append(2)
+    pages.extend(range(start, end + 1))
+    if end < last:
+        if end < last - 2:
+            pages.append(None)
+        elif end == last - 2:
+            pages.append(last - 1)
+        pages.append(last)
+    return pages
@@ -0,0 +1,73 @@
+import logging
+import os
+import threading
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def warm_up_templates(engine_name='django'):
+    """Компилирует все шаблоны из DIRS, чтобы они попали в cached.Loader."""
+    engine = engines[engine_name]
+    compiled = 0
+    for directory in engine.engine.dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if not filename.endswith('.html'):
+                    continue
+                name = os.path.relpath(os.path.join(root, filename), directory)
+                try:
+                    engine.get_template(name.replace(os.sep, '/'))
+                except TemplateSyntaxError:
+                    logger.exception('Не удалось скомпилировать %s', name)
+                else:
+                    compiled += 1
+    return compiled
+
+
+def _profiled(render):
+    def _render(self, context):
+        stats = getattr(_local, 'stats', None)
+        if stats is None:
+            return render(self, context)
+        stack = _local.stack
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            name = self.origin.template_name or '<string>'
+            entry = stats.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += elapsed - children
+    _render.profiled = True
+    return _render
+
+
+def install_profiler():
+    # Template._render вызывается и для страницы, и для каждого
+    # {% include %}, и для родителя из {% extends %}
+    if not getattr(Template._render, 'profiled', False):
+        Template._render = _profiled(Template._render)
+
+
+def start_profiling():
+    _local.stats = {}
+    _local.stack = []
+
+
+def stop_profiling():
+    """Возвращает {шаблон: (вызовов, всего сек, собственное время сек)}."""
+    stats = getattr(_local, 'stats', None) or {}
+    _local.stats = None
+    return {name: tuple(entry) for name, entry in stats.items()}
@@ -0,0 +1,73 @@
+import gzip
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from .. import compression
+from ..middleware import CompressionMiddleware
+
+BODY = ('<article>' + '<p>Текст поста</p>' * 200 + '</article>').encode()
+
+
+class CompressionMiddlewareTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def process(self, response, encoding='gzip, deflate'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=encoding)
+        request.user = AnonymousUser()
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_large_page_is_compressed(self):
+        response = HttpResponse(BODY)
+        response['ETag'] = '"abc"'
+        response = self.process(response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+
+    def test_skipped_responses(self):
+        cases = {
+            'small': HttpResponse(b'<p>ok</p>'),
+            'image': HttpResponse(BODY, content_type='image/png'),
+            'events': StreamingHttpResponse(
+                [BODY], content_type='text/event-stream'
+            ),
+            'identity': HttpResponse(BODY),
+        }
+        for name, response in cases.items():
+            with self.subTest(name=name):
+                encoding = 'identity' if name == 'identity' else 'gzip'
+                response = self.process(response, encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_shared_page_body_compressed_once(self):
+        for _ in range(2):
+            response = HttpResponse(BODY)
+            response.shared_page = True
+            with mock.patch.object(
+                compression, 'compress', wraps=compression.compress
+            ) as compress:
+                response = self.process(response)
+            self.assertEqual(gzip.decompress(response.content), BODY)
+        compress.assert_not_called()
+
+    def test_streaming_response(self):
+        response = self.process(StreamingHttpResponse(iter([BODY] * 3)))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), BODY * 3
+        )
+
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            compression.accepted_encodings('gzip;q=0, br;q=0.5, deflate'),
+            {'br', 'deflate'},
+        )
+        self.assertIsNone(compression.choose_encoding('gzip;q=0.0'))
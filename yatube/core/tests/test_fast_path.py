@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import Client, TestCase
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class AnonymousFastPathTest(TestCase):
+    def test_anonymous_read_skips_session_and_user(self):
+        """Анонимный GET не трогает сессию и не загружает пользователя."""
+        response = Client().get(reverse('about:author'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.wsgi_request.user, AnonymousUser)
+        self.assertIn('Cookie', response['Vary'])
+        self.assertNotIn('sessionid', response.cookies)
+        self.assertIn(str(response.context['year']), response.content.decode())
+
+    def test_requests_with_session_take_full_path(self):
+        user = User.objects.create_user(username='auth')
+        client = Client()
+        client.force_login(user)
+        response = client.get(reverse('about:author'))
+        self.assertEqual(response.wsgi_request.user, user)
+        self.assertIn('Cookie', response['Vary'])
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(SHARED_PAGE_CACHE=True)
+class SharedPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(
+            author=cls.user, text='Первый пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_users_share_page_body(self):
+        """Тело ленты общее, шапка и вкладки - свои у каждого."""
+        url = reverse('posts:group_posts', kwargs={'slug': 'group'})
+        response = Client().get(url)
+        self.assertContains(response, 'Первый пост')
+        self.assertContains(response, 'Войти')
+        self.assertNotContains(response, '<!--hole:')
+
+        response = self.authorized_client.get(url)
+        self.assertTemplateNotUsed(response, 'posts/group_list.html')
+        self.assertContains(response, 'Первый пост')
+        self.assertContains(response, 'Пользователь: auth')
+        self.assertNotContains(response, 'Войти')
+        self.assertNotContains(response, '<!--hole:')
+
+    def test_changes_replace_shared_copy(self):
+        """Новый пост или правка видны сразу, а не через timeout."""
+        url = reverse('posts:group_posts', kwargs={'slug': 'group'})
+        Client().get(url)
+        post = Post.objects.create(
+            author=self.user, text='Второй пост', group=self.group
+        )
+        self.assertContains(Client().get(url), 'Второй пост')
+        post.text = 'Правка'
+        post.save()
+        self.assertContains(Client().get(url), 'Правка')
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertContains(Client().get(url), 'Новое название')
+
+    def test_switcher_follows_user(self):
+        url = reverse('posts:index')
+        self.assertNotContains(Client().get(url), 'Избранные авторы')
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Избранные авторы')
+
+    def test_hole_renders_inline_without_cache(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Избранные авторы')
+        self.assertNotContains(response, '<!--hole:')
@@ -0,0 +1,20 @@
+from django.core.paginator import Paginator
+from django.test import SimpleTestCase
+
+from ..templatetags.pagination import page_window
+
+
+class PageWindowTest(SimpleTestCase):
+    def window(self, number, count):
+        return page_window(Paginator(range(count * 10), 10).page(number))
+
+    def test_window_with_ellipses(self):
+        """Окно: первая, последняя, ±2 вокруг текущей и пропуски."""
+        self.assertEqual(
+            self.window(50, 10000), [1, None, 48, 49, 50, 51, 52, None, 10000]
+        )
+
+    def test_short_gaps_are_filled(self):
+        self.assertEqual(self.window(4, 7), [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(self.window(1, 3), [1, 2, 3])
+        self.assertEqual(self.window(1, 10), [1, 2, 3, None, 10])
@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from .. import ratelimit as ratelimit_module
+from ..ratelimit import hit, parse_rate, ratelimit
+
+User = get_user_model()
+# Середина интервала: цикл запросов не пересекает границу окна
+NOW = 6030.0
+
+
+def frozen_time():
+    return mock.patch.object(
+        ratelimit_module, 'time', mock.Mock(time=lambda: NOW)
+    )
+
+
+class RateLimitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_sliding_window(self):
+        """Предыдущий интервал учитывается с весом оставшейся доли."""
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        for _ in range(4):
+            self.assertTrue(hit('test', 'ip:1', 4, 60, now=60)[0])
+        self.assertEqual(hit('test', 'ip:1', 4, 60, now=61), (False, 60))
+        # через полинтервала от прошлых 4 запросов в окне осталось 2
+        self.assertTrue(hit('test', 'ip:1', 4, 60, now=150)[0])
+        self.assertTrue(hit('test', 'ip:1', 4, 60, now=150)[0])
+        self.assertFalse(hit('test', 'ip:1', 4, 60, now=150)[0])
+        self.assertTrue(hit('test', 'ip:2', 4, 60, now=150)[0])
+
+    def test_comment_flood_gets_429(self):
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(author=user, text='Пост')
+        client = Client()
+        client.force_login(user)
+        url = reverse('posts:add_comment', kwargs={'post_id': post.pk})
+        with frozen_time():
+            for _ in range(25):
+                response = client.post(url, {'text': 'Спам'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Comment.objects.count(), 20)
+
+    def test_rejected_request_does_not_spend_user_quota(self):
+        """Отказ по IP не расходует лимит пользователя."""
+        view = ratelimit('2/m', keys=('user', 'ip'), name='test')(
+            lambda request: HttpResponse()
+        )
+        user, other = [
+            User.objects.create_user(username=name)
+            for name in ('auth', 'other')
+        ]
+        factory = RequestFactory()
+
+        def post(user, ip):
+            request = factory.post('/', REMOTE_ADDR=ip)
+            request.user = user
+            return view(request).status_code
+
+        with frozen_time():
+            self.assertEqual([post(other, '10.0.0.1') for _ in range(2)],
+                             [200, 200])
+            self.assertEqual(post(user, '10.0.0.1'), 429)
+            self.assertEqual([post(user, '10.0.0.2') for _ in range(3)],
+                             [200, 200, 429])
+
+    def test_users_behind_one_proxy_have_own_quota(self):
+        """По умолчанию лимит на пользователя, а не на общий IP прокси."""
+        view = ratelimit('2/m', name='test')(lambda request: HttpResponse())
+        factory = RequestFactory()
+        statuses = []
+        with frozen_time():
+            for name in ('auth', 'other'):
+                request = factory.post('/', REMOTE_ADDR='10.0.0.1')
+                request.user = User.objects.create_user(username=name)
+                statuses += [view(request).status_code for _ in range(2)]
+        self.assertEqual(statuses, [200] * 4)
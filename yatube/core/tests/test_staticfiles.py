@@ -0,0 +1,64 @@
+import gzip
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .. import staticfiles
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class PurgeCssTest(SimpleTestCase):
+    def test_purge_keeps_used_rules(self):
+        css = (
+            '/*! license */:root{--x:1}body{margin:0}'
+            '.btn,.unused{color:red}.unused:hover{color:blue}'
+            '@media (min-width:576px){.col-6{width:50%}.row>.unused{x:1}}'
+            '@media print{.unused{display:none}}'
+            '.card:not(.unused){a:b}[type="a,b"].btn{c:d}'
+        )
+        self.assertEqual(
+            staticfiles.purge_css(css, {'btn', 'col-6', 'card'}),
+            '/*! license */:root{--x:1}body{margin:0}.btn{color:red}'
+            '@media (min-width:576px){.col-6{width:50%}}'
+            '.card:not(.unused){a:b}[type="a,b"].btn{c:d}',
+        )
+
+
+@override_settings(
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+    STATICFILES_STORAGE='core.staticfiles.CompressedManifestStorage',
+)
+class StaticPipelineTest(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def get(self, path, **headers):
+        request = RequestFactory().get('/static/' + path, **headers)
+        return staticfiles.serve(request, path)
+
+    def test_collectstatic_and_serve(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        staticfiles._hashed_names.cache_clear()
+        self.addCleanup(staticfiles._hashed_names.cache_clear)
+        name = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        self.assertNotEqual(name, 'css/bootstrap.min.css')
+
+        response = self.get(name, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        css = gzip.decompress(b''.join(response.streaming_content))
+        self.assertIn(b'.btn-primary', css)
+        self.assertNotIn(b'.carousel', css)
+
+        response = self.get(name, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.get('css/bootstrap.min.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Task
+from ..pool import worker_pool
+from ..tasks import recover, run_pending, task
+
+CALLS = []
+
+
+@task
+def record(value):
+    CALLS.append(value)
+
+
+@task(max_attempts=2)
+def broken():
+    raise ValueError('сломано')
+
+
+@task
+def square(value):
+    return value * value
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_priority_and_idempotency(self):
+        """Сначала приоритетные задачи; повтор ключа не создаёт задачу."""
+        record.delay('обычная')
+        first = record.delay('срочная', priority=10, key='urgent')
+        again = record.delay('срочная', priority=10, key='urgent')
+        self.assertEqual(first.pk, again.pk)
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(CALLS, ['срочная', 'обычная'])
+        self.assertEqual(
+            Task.objects.filter(status=Task.DONE).count(), 2
+        )
+        record.delay('срочная', key='urgent')
+        self.assertEqual(run_pending(), 0)
+
+    def test_retry_then_fail(self):
+        broken.delay()
+        run_pending()
+        queued = Task.objects.get()
+        self.assertEqual((queued.status, queued.attempts), (Task.QUEUED, 1))
+        self.assertIn('сломано', queued.error)
+        self.assertGreater(queued.run_at, timezone.now())
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR'):
+            run_pending()
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_process_pool(self):
+        square.delay(3)
+        broken.delay()
+        with worker_pool(2) as executor:
+            self.assertEqual(run_pending(executor), 2)
+        statuses = dict(Task.objects.values_list('name', 'status'))
+        self.assertEqual(statuses[square.task_name], Task.DONE)
+        self.assertEqual(statuses[broken.task_name], Task.QUEUED)
+
+    def test_recover_stale_tasks(self):
+        stale = record.delay('брошенная')
+        Task.objects.filter(pk=stale.pk).update(
+            status=Task.RUNNING, started=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(recover(), 1)
+        self.assertEqual(Task.objects.get(pk=stale.pk).attempts, 1)
+        self.assertEqual(run_pending(), 1)
+
+    def test_task_crashing_worker_fails(self):
+        """Брошенная задача - это попытка: бесконечных повторов нет."""
+        stale = broken.delay()
+        Task.objects.filter(pk=stale.pk).update(
+            status=Task.RUNNING, attempts=1,
+            started=timezone.now() - timedelta(hours=1),
+        )
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.assertEqual(recover(), 0)
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.attempts), (Task.FAILED, 2))
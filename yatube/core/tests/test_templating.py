@@ -0,0 +1,21 @@
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..templating import warm_up_templates
+
+
+class TemplatingTest(TestCase):
+    def test_warm_up_compiles_all_templates(self):
+        """Прогрев компилирует все шаблоны из каталога templates."""
+        compiled = warm_up_templates()
+        self.assertGreater(compiled, 20)
+        engines['django'].get_template('posts/includes/paginator.html')
+
+    @override_settings(TEMPLATE_PROFILING=True)
+    def test_profiling_reports_includes(self):
+        response = Client().get(reverse('about:author'))
+        timing = response['Server-Timing']
+        self.assertIn('desc="about/author.html"', timing)
+        self.assertIn('desc="includes/header.html"', timing)
+        self.assertIn('desc="base.html"', timing)
@@ -0,0 +1,149 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.http import require_POST, require_safe
+
+from . import feeds
+from .bulk import BulkImporter
+from .models import Comment, Group, Post, User
+
+PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+
+def _page_size(request):
+    try:
+        limit = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        return PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _serialize_post(row):
+    image = row['image']
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'image': settings.MEDIA_URL + image if image else None,
+    }
+
+
+def _serialize_comment(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created': row['created'],
+        'author': row['author__username'],
+    }
+
+
+def not_found():
+    return JsonResponse({'detail': 'not found'}, status=404)
+
+
+def json_response(request, data):
+    """Компактный JSON с ETag: при совпадении If-None-Match отдаём 304."""
+    body = json.dumps(
+        data,
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode()
+    etag = '"%s"' % hashlib.md5(body).hexdigest()
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            body, content_type='application/json; charset=utf-8'
+        )
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def feed_response(request, queryset, extra=None):
+    rows, next_cursor = feeds.keyset_page(
+        queryset.values(*feeds.FEED_FIELDS),
+        request.GET.get('cursor'),
+        _page_size(request),
+    )
+    data = dict(extra or {})
+    data['results'] = [_serialize_post(row) for row in rows]
+    data['next'] = next_cursor
+    return json_response(request, data)
+
+
+@require_safe
+def index(request):
+    return feed_response(request, feeds.index_feed())
+
+
+@require_safe
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).first()
+    if group is None:
+        return not_found()
+    return feed_response(
+        request,
+        feeds.group_feed(group),
+        {'group': {'slug': group.slug, 'title': group.title}},
+    )
+
+
+@require_safe
+def profile(request, username):
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return not_found()
+    return feed_response(
+        request,
+        feeds.profile_feed(author),
+        {'author': author.username},
+    )
+
+
+@require_safe
+def post_detail(request, post_id):
+    rows = Post.objects.filter(pk=post_id).values(*feeds.FEED_FIELDS)[:1]
+    if not rows:
+        return not_found()
+    comments, next_cursor = feeds.keyset_page(
+        Comment.objects.filter(post_id=post_id).values(
+            *feeds.COMMENT_FIELDS
+        ),
+        request.GET.get('cursor'),
+        _page_size(request),
+        date_field='created',
+    )
+    data = _serialize_post(rows[0])
+    data['comments'] = [_serialize_comment(row) for row in comments]
+    data['next'] = next_cursor
+    return json_response(request, data)
+
+
+@require_safe
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {'detail': 'authentication required'}, status=401
+        )
+    return feed_response(request, feeds.follow_feed(request.user))
+
+
+@require_POST
+def bulk_import(request):
+    """Принимает NDJSON-поток постов и комментариев в теле запроса."""
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {'detail': 'authentication required'}, status=401
+        )
+    importer = BulkImporter(
+        author=request.user, allow_author=request.user.is_staff
+    )
+    return JsonResponse(importer.feed(request))
@@ -0,0 +1,86 @@
+import asyncio
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+from django.http.cookie import parse_cookie
+
+from . import events, feeds
+
+
+def _header(scope, name):
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin1')
+    return ''
+
+
+def load_follow_authors(scope):
+    """Авторы из подписок пользователя сессии; None для анонима."""
+    cookies = parse_cookie(_header(scope, b'cookie'))
+    engine = import_module(settings.SESSION_ENGINE)
+    request = SimpleNamespace(session=engine.SessionStore(
+        cookies.get(settings.SESSION_COOKIE_NAME)
+    ))
+    try:
+        user = get_user(request)
+        if not user.is_authenticated:
+            return None
+        return feeds.follow_author_ids(user)
+    finally:
+        close_old_connections()
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def post_events(scope, receive, send, executor):
+    """Асинхронная версия views.post_events: клиент не занимает поток."""
+    loop = asyncio.get_event_loop()
+    authors = None
+    query = parse_qs(scope.get('query_string', b'').decode('latin1'))
+    if query.get('feed') == ['follow']:
+        authors = await loop.run_in_executor(
+            executor, load_follow_authors, scope
+        )
+        if authors is None:
+            await send({'type': 'http.response.start', 'status': 403})
+            await send({'type': 'http.response.body'})
+            return
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+    stream = events.sse_stream_async(
+        events.AsyncSubscription(authors, loop)
+    )
+    try:
+        while True:
+            message = asyncio.ensure_future(stream.__anext__())
+            done, _ = await asyncio.wait(
+                {message, disconnect}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect in done:
+                # клиент ушёл: не ждём следующего события или пинга
+                message.cancel()
+                await asyncio.wait({message})
+                break
+            await send({
+                'type': 'http.response.body',
+                'body': message.result().encode(),
+                'more_body': True,
+            })
+    finally:
+        disconnect.cancel()
+        await stream.aclose()
@@ -0,0 +1,208 @@
+import heapq
+import json
+from collections import defaultdict
+from itertools import count
+
+from django.db import connection, transaction
+
+from .forms import CommentForm, PostForm
+from .models import Comment, Group, Post, User
+from .signals import comments_created, posts_created
+
+CHUNK_SIZE = 500
+MAX_ERRORS = 100
+
+
+class BulkPostForm(PostForm):
+    """Правила PostForm; группа и автор разрешаются сразу для всей пачки."""
+
+    class Meta(PostForm.Meta):
+        fields = ('text',)
+
+
+def _error_messages(form):
+    return {
+        field: [error['message'] for error in errors]
+        for field, errors in form.errors.get_json_data().items()
+    }
+
+
+def fetch_pks(model, objects):
+    """Проставляет pk объектам, сохранённым bulk_create.
+
+    Postgres возвращает их сам. На остальных базах строки пачки ищутся
+    по автору, тексту и времени создания, которое bulk_create задаёт
+    каждому объекту: чужие вставки в ту же таблицу с ними не совпадут.
+    """
+    objects = [obj for obj in objects if obj.pk is None]
+    if not objects or connection.features.can_return_ids_from_bulk_insert:
+        return
+    date_field = next(
+        field.attname for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    )
+    dates = [getattr(obj, date_field) for obj in objects]
+    rows = model.objects.filter(**{
+        f'{date_field}__range': (min(dates), max(dates)),
+        'author_id__in': {obj.author_id for obj in objects},
+    }).order_by('pk').values_list(date_field, 'author_id', 'text', 'pk')
+    found = defaultdict(list)
+    for created, author_id, text, pk in rows:
+        found[created, author_id, text].append(pk)
+    for obj in objects:
+        pks = found.get((getattr(obj, date_field), obj.author_id, obj.text))
+        if pks:
+            obj.pk = pks.pop(0)
+            obj._state.adding = False
+
+
+class BulkImporter:
+    """Импорт постов и комментариев из NDJSON пачками по chunk_size строк.
+
+    Строка поста: {"type": "post", "text": ..., "group": "<slug>"},
+    комментария: {"type": "comment", "post": <id>, "text": ...}.
+    Поле "author" учитывается только при allow_author, иначе
+    автором становится author.
+    """
+
+    forms = {'post': BulkPostForm, 'comment': CommentForm}
+
+    def __init__(self, author=None, allow_author=False, chunk_size=None):
+        self.author = author
+        self.allow_author = allow_author
+        self.chunk_size = chunk_size or CHUNK_SIZE
+        self.pending = {'post': [], 'comment': []}
+        self.stats = {'posts': 0, 'comments': 0, 'errors': []}
+        # ошибки постов находятся при сохранении пачки, позже ошибок
+        # следующих строк: в куче держим MAX_ERRORS первых по номеру строки
+        self._errors = []
+        self._order = count()
+
+    def add_error(self, line, errors):
+        error = (-line, next(self._order), {'line': line, 'errors': errors})
+        if len(self._errors) < MAX_ERRORS:
+            heapq.heappush(self._errors, error)
+        else:
+            heapq.heappushpop(self._errors, error)
+
+    def feed(self, lines):
+        for number, line in enumerate(lines, 1):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8', errors='replace')
+            if line.strip():
+                self.add_line(number, line)
+        self.flush()
+        self.stats['errors'] = [
+            error for _, _, error in sorted(self._errors, reverse=True)
+        ]
+        return self.stats
+
+    def add_line(self, number, line):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if not isinstance(record, dict):
+            self.add_error(number, {'__all__': ['Некорректный JSON.']})
+            return
+        kind = record.get('type', 'post')
+        if kind not in self.forms:
+            self.add_error(number, {'type': [f'Неизвестный тип {kind}.']})
+            return
+        form = self.forms[kind](record)
+        if not form.is_valid():
+            self.add_error(number, _error_messages(form))
+            return
+        self.pending[kind].append((number, form.save(commit=False), record))
+        if sum(map(len, self.pending.values())) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        with transaction.atomic():
+            posts = self._save_posts(self.pending['post'])
+            comments = self._save_comments(self.pending['comment'])
+        self.pending = {'post': [], 'comment': []}
+        if posts:
+            posts_created.send(sender=Post, posts=posts)
+        if comments:
+            comments_created.send(sender=Comment, comments=comments)
+
+    def _authors(self, pending):
+        if not self.allow_author:
+            return {}
+        usernames = {
+            record['author'] for _, _, record in pending
+            if record.get('author')
+        }
+        return dict(
+            User.objects.filter(
+                username__in=usernames
+            ).values_list('username', 'pk')
+        )
+
+    def _author_id(self, number, record, authors):
+        username = record.get('author') if self.allow_author else None
+        if username:
+            author_id = authors.get(username)
+        else:
+            author_id = self.author.pk if self.author else None
+        if author_id is None:
+            self.add_error(number, {'author': ['Автор не найден.']})
+        return author_id
+
+    def _save_posts(self, pending):
+        if not pending:
+            return []
+        slugs = {record['group'] for _, _, record in pending
+                 if record.get('group')}
+        groups = dict(
+            Group.objects.filter(slug__in=slugs).values_list('slug', 'pk')
+        )
+        authors = self._authors(pending)
+        posts = []
+        for number, post, record in pending:
+            slug = record.get('group')
+            if slug and slug not in groups:
+                self.add_error(number, {'group': ['Группа не найдена.']})
+                continue
+            post.author_id = self._author_id(number, record, authors)
+            if post.author_id is None:
+                continue
+            post.group_id = groups.get(slug)
+            posts.append(post)
+        Post.objects.bulk_create(posts)
+        fetch_pks(Post, posts)
+        self.stats['posts'] += len(posts)
+        return posts
+
+    def _save_comments(self, pending):
+        if not pending:
+            return []
+        post_ids = set()
+        for _, _, record in pending:
+            try:
+                post_ids.add(int(record.get('post')))
+            except (TypeError, ValueError):
+                pass
+        existing = set(
+            Post.objects.filter(pk__in=post_ids).values_list('pk', flat=True)
+        )
+        authors = self._authors(pending)
+        comments = []
+        for number, comment, record in pending:
+            try:
+                post_id = int(record.get('post'))
+            except (TypeError, ValueError):
+                post_id = None
+            if post_id not in existing:
+                self.add_error(number, {'post': ['Пост не найден.']})
+                continue
+            comment.author_id = self._author_id(number, record, authors)
+            if comment.author_id is None:
+                continue
+            comment.post_id = post_id
+            comments.append(comment)
+        Comment.objects.bulk_create(comments)
+        fetch_pks(Comment, comments)
+        self.stats['comments'] += len(comments)
+        return comments
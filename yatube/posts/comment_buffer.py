@@ -0,0 +1,204 @@
+import fcntl
+import json
+import os
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import conditional
+from .bulk import CHUNK_SIZE
+from .models import Comment, Post
+from .signals import comments_created
+
+# Файл-журнал: add_comment дописывает в него строку JSON, flush забирает
+# его целиком переименованием и переносит в базу пачками bulk_create.
+# Запись - один write с O_APPEND: переживает падение процесса, но не
+# питания, fsync на каждый комментарий не делается.
+LOG_NAME = 'comments.log'
+PENDING_TIMEOUT = 60 * 60
+# Сколько строк получает время создания одним UPDATE ... CASE
+CREATED_BATCH = 300
+
+
+def enabled():
+    return settings.COMMENT_BUFFER
+
+
+def _path(name):
+    return os.path.join(settings.COMMENT_BUFFER_DIR, name)
+
+
+def _pending_key(post_id, author_id):
+    return f'comment-pending:{post_id}:{author_id}'
+
+
+def _write(line):
+    os.makedirs(settings.COMMENT_BUFFER_DIR, exist_ok=True)
+    path = _path(LOG_NAME)
+    while True:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            # flush держит эксклюзивную блокировку, пока читает файл;
+            # если файл за это время уже забран, пишем в новый
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                os.write(fd, line)
+                return
+        except FileNotFoundError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def append(post_id, author, text):
+    """Ставит комментарий в очередь; автор сразу видит его под постом."""
+    record = {
+        'id': uuid.uuid4().hex,
+        'post': post_id,
+        'author': author.pk,
+        'text': text,
+        'created': timezone.now().isoformat(),
+    }
+    _write((json.dumps(record, ensure_ascii=False) + '\n').encode())
+    key = _pending_key(post_id, author.pk)
+    cache.set(key, cache.get(key, []) + [record], PENDING_TIMEOUT)
+    conditional.touch([conditional.post_key(post_id)])
+    return record
+
+
+def pending(post_id, user):
+    """Ещё не перенесённые в базу комментарии пользователя к посту.
+
+    flush идёт в другом процессе и чистит только свой кэш, поэтому
+    перенесённые записи отсеиваются здесь по Comment.buffer_id.
+    """
+    if not user.is_authenticated:
+        return []
+    records = cache.get(_pending_key(post_id, user.pk), [])
+    if not records:
+        return []
+    saved = set(Comment.objects.filter(
+        buffer_id__in=[uuid.UUID(record['id']) for record in records]
+    ).values_list('buffer_id', flat=True))
+    return [
+        Comment(
+            post_id=post_id,
+            author=user,
+            text=record['text'],
+            created=parse_datetime(record['created']),
+        )
+        for record in reversed(records)
+        if uuid.UUID(record['id']) not in saved
+    ]
+
+
+def _read(path):
+    records = []
+    with open(path, encoding='utf-8') as log:
+        # дожидаемся тех, кто начал писать в файл до переименования
+        fcntl.flock(log, fcntl.LOCK_EX)
+        for line in log:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # оборванная последняя строка при падении процесса
+                continue
+    return records
+
+
+def _set_created(comments):
+    # auto_now_add ставит время переноса; возвращаем время из журнала
+    for start in range(0, len(comments), CREATED_BATCH):
+        batch = comments[start:start + CREATED_BATCH]
+        Comment.objects.filter(pk__in=[c.pk for c in batch]).update(
+            created=Case(
+                *[When(pk=c.pk, then=Value(c.created)) for c in batch],
+                output_field=DateTimeField(),
+            )
+        )
+
+
+def _save(records):
+    """Сохраняет записи, которых ещё нет в базе; возвращает новые.
+
+    id записи хранится в Comment.buffer_id, так что пачка, сохранённая
+    перед падением flush, при повторе пропускается.
+    """
+    existing = set(Post.objects.filter(
+        pk__in={record['post'] for record in records}
+    ).values_list('pk', flat=True))
+    ids = [uuid.UUID(record['id']) for record in records]
+    saved = set(Comment.objects.filter(buffer_id__in=ids).values_list(
+        'buffer_id', flat=True
+    ))
+    comments = [
+        Comment(
+            post_id=record['post'],
+            author_id=record['author'],
+            text=record['text'],
+            buffer_id=buffer_id,
+        )
+        for record, buffer_id in zip(records, ids)
+        if record['post'] in existing and buffer_id not in saved
+    ]
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments, ignore_conflicts=True)
+        pks = dict(Comment.objects.filter(
+            buffer_id__in=[comment.buffer_id for comment in comments]
+        ).values_list('buffer_id', 'pk'))
+        created = {
+            uuid.UUID(record['id']): parse_datetime(record['created'])
+            for record in records
+        }
+        for comment in comments:
+            comment.pk = pks[comment.buffer_id]
+            comment._state.adding = False
+            comment.created = created[comment.buffer_id]
+        _set_created(comments)
+    if comments:
+        comments_created.send(sender=Comment, comments=comments)
+    return comments
+
+
+def _forget(records):
+    keys = {
+        _pending_key(record['post'], record['author']) for record in records
+    }
+    flushed = {record['id'] for record in records}
+    for key, value in cache.get_many(keys).items():
+        left = [record for record in value if record['id'] not in flushed]
+        if left:
+            cache.set(key, left, PENDING_TIMEOUT)
+        else:
+            cache.delete(key)
+
+
+def flush(chunk_size=CHUNK_SIZE):
+    """Переносит накопленные комментарии в базу; возвращает их число.
+
+    Файл забирается переименованием, так что запись новых комментариев
+    не ждёт переноса. После падения забранный файл переносится заново:
+    уже сохранённые записи узнаются по buffer_id и пропускаются.
+    """
+    os.makedirs(settings.COMMENT_BUFFER_DIR, exist_ok=True)
+    flushing = _path(LOG_NAME + '.flushing')
+    with open(_path('flush.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.exists(flushing):
+            try:
+                os.replace(_path(LOG_NAME), flushing)
+            except FileNotFoundError:
+                return 0
+        records = _read(flushing)
+        saved = 0
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            saved += len(_save(chunk))
+            _forget(chunk)
+        os.remove(flushing)
+        return saved
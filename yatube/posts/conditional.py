@@ -0,0 +1,187 @@
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Max
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from . import counts, feeds, trending
+from .models import Comment, Group, PageVersion, Post, User
+
+# Версия - время последнего изменения того, что показывает страница.
+# Свежие посты видны по последней записи ленты, а правки, удаления,
+# комментарии и подписки отмечаются в PageVersion из сигналов и views:
+# в базе их видят все процессы.
+
+# Имена авторов выводятся на всех страницах с постами и комментариями
+PROFILES_KEY = 'profiles'
+RECOMMENDATIONS_KEY = 'recommendations'
+# Версия ключа, который ещё ни разу не менялся
+NEVER = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+# Модерация трогает ключи тысяч авторов: IN по частям
+TOUCH_BATCH = 500
+
+
+def post_key(post_id):
+    return f'post:{post_id}'
+
+
+def follow_key(user_id):
+    return f'follow:{user_id}'
+
+
+def versions(keys):
+    """Метки времени по ключам одним запросом."""
+    found = dict(PageVersion.objects.filter(key__in=keys).values_list(
+        'key', 'changed'
+    ))
+    return [found.get(key, NEVER).timestamp() for key in keys]
+
+
+def touch(keys):
+    keys = sorted(set(keys))
+    now = timezone.now()
+    for start in range(0, len(keys), TOUCH_BATCH):
+        batch = keys[start:start + TOUCH_BATCH]
+        updated = PageVersion.objects.filter(key__in=batch).update(
+            changed=now
+        )
+        if updated < len(batch):
+            # уже существующие ключи обновлены выше, конфликт их пропустит
+            PageVersion.objects.bulk_create(
+                [PageVersion(key=key, changed=now) for key in batch],
+                ignore_conflicts=True,
+            )
+
+
+def touch_posts(posts):
+    keys = set()
+    for post in posts:
+        keys.update(counts.post_keys(post))
+        keys.add(post_key(post.pk))
+    touch(keys)
+
+
+def _validators(latest, keys, *stamps):
+    """(части ETag, Last-Modified) из последней записи и версий."""
+    stamps = [stamp.timestamp() for stamp in stamps if stamp]
+    stamps += versions(keys)
+    modified = datetime.fromtimestamp(max(stamps), dt_timezone.utc)
+    return (latest,) + tuple(stamps), modified
+
+
+def _viewer_keys(request, recommendations=False):
+    if not request.user.is_authenticated:
+        return []
+    keys = [follow_key(request.user.pk)]
+    if recommendations:
+        keys.append(RECOMMENDATIONS_KEY)
+    return keys
+
+
+def _latest(queryset):
+    return queryset.values_list('pub_date', 'pk').first() or (None, None)
+
+
+def _compute(validators, request, *args, **kwargs):
+    """Валидаторы считаются один раз на запрос, сколько бы их ни спросили."""
+    if not hasattr(request, '_page_validators'):
+        request._page_validators = validators(request, *args, **kwargs)
+    return request._page_validators
+
+
+def page_version(validators):
+    """Версия общей копии страницы для holes.shared_page.
+
+    Те же данные, что в ETag, но без пользователя: копия меняется вместе
+    с тем, что на ней показано.
+    """
+    def version(request, *args, **kwargs):
+        result = _compute(validators, request, *args, **kwargs)
+        return None if result is None else result[0]
+    return version
+
+
+def index_validators(request):
+    latest = _latest(feeds.index_feed())
+    return _validators(latest, [counts.INDEX_KEY, PROFILES_KEY], latest[0])
+
+
+def group_validators(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return None
+    latest = _latest(feeds.group_feed(group_id))
+    keys = [counts.group_key(group_id), PROFILES_KEY]
+    return _validators(latest, keys, latest[0])
+
+
+def profile_validators(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return None
+    latest = _latest(feeds.profile_feed(author_id))
+    keys = [counts.author_key(author_id), follow_key(author_id), PROFILES_KEY]
+    keys += _viewer_keys(request, recommendations=True)
+    return _validators(latest, keys, latest[0])
+
+
+def post_validators(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'pub_date', 'author_id'
+    ).first()
+    if post is None:
+        return None
+    pub_date, author_id = post
+    commented = Comment.objects.filter(post_id=post_id).aggregate(
+        last=Max('created')
+    )['last']
+    keys = [post_key(post_id), counts.author_key(author_id), PROFILES_KEY]
+    keys += _viewer_keys(request)
+    return _validators((pub_date, commented), keys, pub_date, commented)
+
+
+def popular_validators(request):
+    # правки и удаления постов трогают INDEX_KEY, смена топа видна по id
+    ranking = (
+        tuple(trending.top_ids(trending.POSTS_KEY)),
+        tuple(trending.top_ids(trending.GROUPS_KEY, limit=10)),
+    )
+    keys = [counts.INDEX_KEY, PROFILES_KEY]
+    keys += [counts.group_key(group_id) for group_id in ranking[1]]
+    return _validators(ranking, keys)
+
+
+def conditional_page(validators):
+    """condition() с ETag и Last-Modified из validators(request, **kwargs).
+
+    Валидаторы считаются один раз на запрос и до основных запросов view.
+    ETag включает пользователя: шапка страницы у каждого своя. Поэтому
+    Last-Modified отдаётся только анониму. В ETag входят и csrf-токен
+    с ключом сессии: после нового входа форма с прежним токеном из кэша
+    браузера не подойдёт.
+    """
+    def etag(request, *args, **kwargs):
+        result = _compute(validators, request, *args, **kwargs)
+        if result is None:
+            return None
+        parts = result[0] + (
+            request.user.pk,
+            request.GET.urlencode(),
+            request.META.get('CSRF_COOKIE'),
+        )
+        if request.user.is_authenticated:
+            parts += (request.session.session_key,)
+        return hashlib.md5(repr(parts).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        result = _compute(validators, request, *args, **kwargs)
+        if result is None or request.user.is_authenticated:
+            return None
+        return result[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
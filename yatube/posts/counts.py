@@ -0,0 +1,151 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import F
+from django.utils.functional import cached_property
+
+from core.tasks import task
+from . import group_stats
+from .models import FeedCounter, GroupStats, Post
+
+# Счётчики лежат в базе: FeedCounter для всей ленты и авторов, GroupStats
+# для групп. Сигналы сдвигают их на каждый пост, модерация - на пачку.
+INDEX_KEY = 'all'
+
+
+def group_key(group_id):
+    return f'group:{group_id}'
+
+
+def author_key(author_id):
+    return f'author:{author_id}'
+
+
+def post_keys(post):
+    keys = [INDEX_KEY, author_key(post.author_id)]
+    if post.group_id:
+        keys.append(group_key(post.group_id))
+    return keys
+
+
+def _group_id(key):
+    if key.startswith('group:'):
+        return int(key.split(':', 1)[1])
+    return None
+
+
+def _feed(key):
+    if key == INDEX_KEY:
+        return Post.objects.all()
+    return Post.objects.filter(author_id=int(key.split(':', 1)[1]))
+
+
+@task
+def recount(key):
+    """Точный COUNT(*) ленты в её счётчик."""
+    group_id = _group_id(key)
+    if group_id is not None:
+        group_stats.refresh([group_id])
+        return
+    FeedCounter.objects.update_or_create(
+        key=key, defaults={'posts_count': _feed(key).count()}
+    )
+
+
+def refresh_index_count():
+    """Пересчитывает всю ленту (manage.py refresh_counts)."""
+    recount(INDEX_KEY)
+    return feed_count(INDEX_KEY)
+
+
+def feed_count(key):
+    """Счётчик ленты; None, если его ещё нет.
+
+    Тогда лента пересчитывается в фоне, а запрос обходится без COUNT(*).
+    """
+    group_id = _group_id(key)
+    if group_id is not None:
+        counters = GroupStats.objects.filter(group_id=group_id)
+    else:
+        counters = FeedCounter.objects.filter(key=key)
+    value = counters.values_list('posts_count', flat=True).first()
+    if value is None:
+        recount.delay(key, key=f'recount:{key}')
+        return None
+    return max(value, 0)
+
+
+def change_counts(deltas):
+    """Применяет {ключ: изменение} к счётчикам лент.
+
+    Группы пропускаются: их GroupStats обновляет posts.group_stats.
+    """
+    for key, delta in deltas.items():
+        if not delta or _group_id(key) is not None:
+            continue
+        updated = FeedCounter.objects.filter(key=key).update(
+            posts_count=F('posts_count') + delta
+        )
+        if not updated and delta > 0:
+            # у автора ещё не было постов
+            FeedCounter.objects.get_or_create(
+                key=key, defaults={'posts_count': delta}
+            )
+
+
+def count_posts(posts, sign=1):
+    deltas = Counter()
+    for post in posts:
+        for key in post_keys(post):
+            deltas[key] += sign
+    change_counts(deltas)
+
+
+class ApproximatePaginator(Paginator):
+    """Paginator, который не делает COUNT(*) по большой ленте.
+
+    До EXACT_COUNT_LIMIT записей число точное (COUNT ограничен LIMIT),
+    выше - берётся поддерживаемый счётчик и approximate становится True.
+    Без count_key счётчика нет, и страницы обрезаются по этому пределу.
+    """
+
+    def __init__(self, object_list, per_page, count_key, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.approximate = False
+
+    @cached_property
+    def count(self):
+        limit = settings.EXACT_COUNT_LIMIT
+        bounded = self.object_list[:limit + 1].count()
+        if bounded <= limit:
+            return bounded
+        self.approximate = True
+        if self.count_key is None:
+            return bounded
+        return max(feed_count(self.count_key) or 0, bounded)
+
+
+def approximate_count(queryset, key):
+    """(число записей, приблизительное ли оно) по правилам paginator."""
+    paginator = ApproximatePaginator(queryset, 1, key)
+    return paginator.count, paginator.approximate
+
+
+class AdminPaginator(ApproximatePaginator):
+    """Для changelist: вся таблица - по счётчику, выборка фильтра или
+    поиска - точным COUNT, иначе её дальние страницы недостижимы."""
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True):
+        super().__init__(
+            object_list, per_page, INDEX_KEY,
+            orphans=orphans, allow_empty_first_page=allow_empty_first_page,
+        )
+
+    @cached_property
+    def count(self):
+        if self.object_list.query.where:
+            return Paginator.count.func(self)
+        return ApproximatePaginator.count.func(self)
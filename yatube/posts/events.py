@@ -0,0 +1,124 @@
+import asyncio
+import json
+import queue
+import threading
+
+HEARTBEAT = 15
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    """Очередь событий одного клиента для потоков WSGI."""
+
+    def __init__(self, authors=None):
+        # authors - id авторов, о чьих постах сообщать; None - обо всех
+        self.authors = authors
+        self.queue = queue.Queue(QUEUE_SIZE)
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # медленный клиент теряет событие, но не тормозит публикацию
+            pass
+
+    def get(self, timeout=HEARTBEAT):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription(Subscription):
+    """Та же очередь для корутин: события приходят в цикл событий."""
+
+    def __init__(self, authors=None, loop=None):
+        self.authors = authors
+        self.loop = loop or asyncio.get_event_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    async def get(self, timeout=HEARTBEAT):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broker:
+    """Внутрипроцессный pub/sub: издатели и подписчики в одном процессе."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def subscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    @property
+    def has_subscribers(self):
+        return bool(self._subscriptions)
+
+    def publish(self, posts):
+        """posts - список словарей с ключами id, author_id и author."""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.authors is None:
+                event = posts
+            else:
+                event = [
+                    post for post in posts
+                    if post['author_id'] in subscription.authors
+                ]
+            if event:
+                subscription.deliver(event)
+
+
+broker = Broker()
+
+
+def format_event(posts):
+    data = json.dumps(
+        [{'id': post['id'], 'author': post['author']} for post in posts],
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+    last_id = max(post['id'] for post in posts)
+    return f'id: {last_id}\nevent: posts\ndata: {data}\n\n'
+
+
+def sse_stream(subscription, heartbeat=HEARTBEAT):
+    broker.subscribe(subscription)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            posts = subscription.get(timeout=heartbeat)
+            yield format_event(posts) if posts else ': ping\n\n'
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def sse_stream_async(subscription, heartbeat=HEARTBEAT):
+    broker.subscribe(subscription)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            posts = await subscription.get(timeout=heartbeat)
+            yield format_event(posts) if posts else ': ping\n\n'
+    finally:
+        broker.unsubscribe(subscription)
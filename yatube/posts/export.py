@@ -0,0 +1,98 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Follow, Post
+
+CHUNK_SIZE = 2000
+CSV_FIELDS = ('type', 'id', 'date', 'author', 'text', 'group', 'post', 'user')
+FORMATS = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def iter_rows(queryset, fields, chunk_size=CHUNK_SIZE):
+    """Обходит queryset по возрастанию pk пачками по chunk_size строк.
+
+    Каждая пачка - отдельный запрос WHERE pk > последний, поэтому
+    в памяти одновременно не больше одной пачки.
+    """
+    last_pk = 0
+    while True:
+        count = 0
+        chunk = queryset.filter(pk__gt=last_pk).order_by('pk').values(
+            'pk', *fields
+        )[:chunk_size]
+        for row in chunk.iterator(chunk_size=chunk_size):
+            count += 1
+            last_pk = row['pk']
+            yield row
+        if count < chunk_size:
+            return
+
+
+def export_records(user=None, chunk_size=CHUNK_SIZE):
+    """Посты, комментарии и подписки user (или всех) в формате импорта."""
+    posts = Post.objects.all()
+    comments = Comment.objects.all()
+    follows = Follow.objects.all()
+    if user is not None:
+        posts = posts.filter(author=user)
+        comments = comments.filter(author=user)
+        follows = follows.filter(user=user)
+    fields = ('pub_date', 'author__username', 'text', 'group__slug')
+    for row in iter_rows(posts, fields, chunk_size):
+        yield {
+            'type': 'post',
+            'id': row['pk'],
+            'date': row['pub_date'],
+            'author': row['author__username'],
+            'text': row['text'],
+            'group': row['group__slug'],
+        }
+    fields = ('created', 'author__username', 'text', 'post_id')
+    for row in iter_rows(comments, fields, chunk_size):
+        yield {
+            'type': 'comment',
+            'id': row['pk'],
+            'date': row['created'],
+            'author': row['author__username'],
+            'text': row['text'],
+            'post': row['post_id'],
+        }
+    fields = ('user__username', 'author__username')
+    for row in iter_rows(follows, fields, chunk_size):
+        yield {
+            'type': 'follow',
+            'id': row['pk'],
+            'author': row['author__username'],
+            'user': row['user__username'],
+        }
+
+
+def ndjson_lines(records):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for record in records:
+        yield encoder.encode(record) + '\n'
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(records):
+    writer = csv.DictWriter(_Echo(), fieldnames=CSV_FIELDS)
+    yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
+
+
+def export_lines(fmt, user=None, chunk_size=CHUNK_SIZE):
+    records = export_records(user, chunk_size)
+    if fmt == 'csv':
+        return csv_lines(records)
+    return ndjson_lines(records)
@@ -0,0 +1,96 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .following import following_set
+from .models import Post
+
+FEED_FIELDS = (
+    'id',
+    'text',
+    'pub_date',
+    'image',
+    'author__username',
+    'group__slug',
+)
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+
+
+def index_feed():
+    return Post.objects.all()
+
+
+def group_feed(group):
+    return Post.objects.filter(group=group)
+
+
+def profile_feed(author):
+    return Post.objects.filter(author=author)
+
+
+def follow_feed(user):
+    return Post.objects.filter(author__following__user=user)
+
+
+def follow_author_ids(user):
+    return set(following_set(user))
+
+
+def encode_cursor(pub_date, pk):
+    """Курсор ленты: позиция последней записи в порядке (-pub_date, -pk)."""
+    raw = f'{pub_date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        pub_date, pk = raw.rsplit('|', 1)
+        return parse_datetime(pub_date), int(pk)
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def encode_group_cursor(group):
+    raw = f'{group.pk}|{group.title}'.encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_group_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        pk, title = raw.split('|', 1)
+        return title, int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(queryset, cursor=None, limit=10, date_field='pub_date'):
+    """Возвращает limit записей после курсора и курсор следующей страницы.
+
+    Вместо OFFSET фильтруем по паре (date_field, pk), поэтому стоимость
+    запроса не зависит от номера страницы.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None and position[0] is not None:
+        date, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__lt': date})
+            | Q(**{date_field: date, 'pk__lt': pk})
+        )
+    rows = list(
+        queryset.order_by(f'-{date_field}', '-pk')[:limit + 1]
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last[date_field], last['id'])
+        else:
+            next_cursor = encode_cursor(getattr(last, date_field), last.pk)
+    return rows, next_cursor
@@ -0,0 +1,106 @@
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Follow, FollowCounter
+
+FOLLOWING_TIMEOUT = 24 * 60 * 60
+
+
+def _cache_key(user_id):
+    return f'following:{user_id}'
+
+
+class FollowingSet:
+    """Отсортированный массив id авторов, на которых подписан пользователь.
+
+    Проверка "подписан ли на X" - бинарный поиск без запросов к БД.
+    """
+
+    def __init__(self, author_ids):
+        self.author_ids = author_ids
+
+    def __contains__(self, author_id):
+        index = bisect_left(self.author_ids, author_id)
+        return (
+            index < len(self.author_ids)
+            and self.author_ids[index] == author_id
+        )
+
+    def __iter__(self):
+        return iter(self.author_ids)
+
+    def __len__(self):
+        return len(self.author_ids)
+
+
+def _load(user_id):
+    packed = cache.get(_cache_key(user_id))
+    author_ids = array('q')
+    if packed is not None:
+        author_ids.frombytes(packed)
+        return author_ids
+    author_ids.extend(
+        Follow.objects.filter(user_id=user_id).order_by(
+            'author_id'
+        ).values_list('author_id', flat=True)
+    )
+    cache.set(_cache_key(user_id), author_ids.tobytes(), FOLLOWING_TIMEOUT)
+    return author_ids
+
+
+def following_set(user):
+    """Подписки пользователя; загружаются один раз на объект user."""
+    if not user.is_authenticated:
+        return FollowingSet(array('q'))
+    cached = getattr(user, '_following_set', None)
+    if cached is None:
+        cached = user._following_set = FollowingSet(_load(user.pk))
+    return cached
+
+
+def invalidate(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def change_follow_counts(user_id, author_id, delta):
+    """Сдвигает счётчики подписок user_id и подписчиков author_id на delta.
+
+    Вызывается из сигналов Follow, так что подписки из админки и
+    каскадные удаления учитываются так же, как из views.
+    """
+    pairs = ((user_id, 'following'), (author_id, 'followers'))
+    with transaction.atomic():
+        for counter_id, field in pairs:
+            updated = FollowCounter.objects.filter(user_id=counter_id).update(
+                **{field: F(field) + delta}
+            )
+            if not updated and delta > 0:
+                FollowCounter.objects.get_or_create(
+                    user_id=counter_id, defaults={field: delta}
+                )
+
+
+def follow_counts(user):
+    """(подписчиков, подписок) одним запросом по первичному ключу."""
+    counts = FollowCounter.objects.filter(user=user).values_list(
+        'followers', 'following'
+    ).first()
+    return counts or (0, 0)
+
+
+def follow_page(queryset, before=None, limit=20):
+    """Страница подписок от новых к старым и id для ссылки "дальше".
+
+    Фильтр по id < before идёт по индексу (author, id) или (user, id),
+    поэтому глубина страницы не влияет на стоимость запроса.
+    """
+    if before:
+        queryset = queryset.filter(pk__lt=before)
+    rows = list(queryset.order_by('-pk')[:limit + 1])
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].pk
+    return rows, None
@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+from django.db.models import Count, F, Max
+from django.db.models.functions import Greatest
+
+from .models import GroupStats, Post
+
+
+def refresh(group_ids):
+    """Точный пересчёт агрегатов групп: для правок и массовых операций."""
+    for group_id in set(group_ids) - {None}:
+        stats = Post.objects.filter(group_id=group_id).aggregate(
+            posts_count=Count('id'),
+            authors_count=Count('author', distinct=True),
+            last_activity=Max('pub_date'),
+        )
+        GroupStats.objects.update_or_create(group_id=group_id, defaults=stats)
+
+
+def _by_group(posts):
+    groups = defaultdict(list)
+    for post in posts:
+        if post.group_id:
+            groups[post.group_id].append(post)
+    return groups
+
+
+def _other_authors(groups):
+    """Пары (группа, автор), у которых в группе есть и другие посты.
+
+    Один запрос на пачку, а не на каждую пару.
+    """
+    posts = [post for group_posts in groups.values() for post in group_posts]
+    return set(Post.objects.filter(
+        group_id__in=groups, author_id__in={post.author_id for post in posts}
+    ).exclude(
+        pk__in=[post.pk for post in posts]
+    ).order_by().values_list('group_id', 'author_id').distinct())
+
+
+def _lone_authors(group_id, group_posts, others):
+    return sum(
+        (group_id, author_id) not in others
+        for author_id in {post.author_id for post in group_posts}
+    )
+
+
+def posts_added(posts):
+    groups = _by_group(posts)
+    if not groups:
+        return
+    others = _other_authors(groups)
+    for group_id, group_posts in groups.items():
+        updated = GroupStats.objects.filter(group_id=group_id).update(
+            posts_count=F('posts_count') + len(group_posts),
+            authors_count=F('authors_count') + _lone_authors(
+                group_id, group_posts, others
+            ),
+            last_activity=max(post.pub_date for post in group_posts),
+        )
+        if not updated:
+            refresh([group_id])
+
+
+def posts_removed(posts):
+    groups = _by_group(posts)
+    if not groups:
+        return
+    others = _other_authors(groups)
+    for group_id, group_posts in groups.items():
+        post_ids = [post.pk for post in group_posts]
+        gone_authors = _lone_authors(group_id, group_posts, others)
+        last_activity = Post.objects.filter(group_id=group_id).exclude(
+            pk__in=post_ids
+        ).order_by('-pub_date').values_list('pub_date', flat=True).first()
+        GroupStats.objects.filter(group_id=group_id).update(
+            posts_count=Greatest(F('posts_count') - len(group_posts), 0),
+            authors_count=Greatest(F('authors_count') - gone_authors, 0),
+            last_activity=last_activity,
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import (
+    BATCH_SIZE, RECOMMENDATIONS_TTL, build_recommendations
+)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов для всех пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--ttl', type=int, default=RECOMMENDATIONS_TTL,
+            help='Сколько секунд хранить рекомендации.',
+        )
+
+    def handle(self, *args, **options):
+        stored = build_recommendations(options['batch_size'], options['ttl'])
+        self.stdout.write(f'Рекомендации сохранены для {stored} польз.')
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.bulk import CHUNK_SIZE
+from posts.comment_buffer import flush
+
+
+class Command(BaseCommand):
+    help = 'Переносит комментарии из журнала отложенной записи в базу.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Работать постоянно, перенося журнал раз в столько секунд.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        while True:
+            saved = flush(options['chunk_size'])
+            if saved or not options['interval']:
+                self.stdout.write(f'Перенесено комментариев: {saved}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,49 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.bulk import CHUNK_SIZE, BulkImporter
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Импортирует посты и комментарии из NDJSON-файла.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Путь к NDJSON-файлу или "-" для stdin.'
+        )
+        parser.add_argument(
+            '--author',
+            help='Автор по умолчанию для строк без поля "author".',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Сколько строк сохранять в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        author = None
+        if options['author']:
+            try:
+                author = User.objects.get(username=options['author'])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'Пользователь {options["author"]} не найден.'
+                )
+        importer = BulkImporter(
+            author=author,
+            allow_author=True,
+            chunk_size=options['chunk_size'],
+        )
+        if options['path'] == '-':
+            stats = importer.feed(sys.stdin)
+        else:
+            with open(options['path'], encoding='utf-8') as stream:
+                stats = importer.feed(stream)
+        for error in stats['errors']:
+            self.stderr.write(f'Строка {error["line"]}: {error["errors"]}')
+        self.stdout.write(
+            f'Постов: {stats["posts"]}, комментариев: {stats["comments"]}, '
+            f'ошибок: {len(stats["errors"])}'
+        )
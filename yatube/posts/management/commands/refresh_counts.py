@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.counts import refresh_index_count
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает число записей главной ленты: исправляет дрейф '
+            'счётчика, запускать по cron.')
+
+    def handle(self, *args, **options):
+        total = refresh_index_count()
+        self.stdout.write(f'Записей в ленте: {total}.')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.notifications import send_digests
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма с накопившимися подписками и комментариями.'
+
+    def handle(self, *args, **options):
+        sent = send_digests()
+        self.stdout.write(f'Отправлено писем: {sent}')
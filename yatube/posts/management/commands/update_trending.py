@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает популярные посты и группы по свежей активности.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=3,
+            help='За сколько дней учитывать комментарии и посты.',
+        )
+
+    def handle(self, *args, **options):
+        rebuild(options['days'])
+        self.stdout.write('Популярное пересчитано.')
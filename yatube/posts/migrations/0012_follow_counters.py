@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:44
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    FollowCounter = apps.get_model('posts', 'FollowCounter')
+    counters = {}
+    for row in Follow.objects.values('author').annotate(total=Count('id')):
+        counters.setdefault(row['author'], [0, 0])[0] = row['total']
+    for row in Follow.objects.values('user').annotate(total=Count('id')):
+        counters.setdefault(row['user'], [0, 0])[1] = row['total']
+    FollowCounter.objects.bulk_create(
+        FollowCounter(user_id=user_id, followers=followers, following=following)
+        for user_id, (followers, following) in counters.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0011_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='follow_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('followers', models.PositiveIntegerField(default=0, verbose_name='Подписчики')),
+                ('following', models.PositiveIntegerField(default=0, verbose_name='Подписки')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['author', '-id'], name='follow_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['user', '-id'], name='follow_user_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
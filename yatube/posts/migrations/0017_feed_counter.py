@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:35
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    FeedCounter = apps.get_model('posts', 'FeedCounter')
+    counters = [FeedCounter(key='all', posts_count=Post.objects.count())]
+    rows = Post.objects.values('author').annotate(total=Count('id')).order_by()
+    counters += [
+        FeedCounter(key=f'author:{row["author"]}', posts_count=row['total'])
+        for row in rows
+    ]
+    FeedCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_comment_buffer_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedCounter',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Лента')),
+                ('posts_count', models.IntegerField(default=0, verbose_name='Постов')),
+            ],
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
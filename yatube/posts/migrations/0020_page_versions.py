@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_trending_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageVersion',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Ключ')),
+                ('changed', models.DateTimeField(verbose_name='Изменено')),
+            ],
+        ),
+    ]
@@ -12,6 +12,42 @@ class Group(models.Model):
     def __str__(self) -> str:
         return self.title
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['title', 'id'], name='group_title_idx'),
+        ]
+
+
+class GroupStats(models.Model):
+    """Агрегаты группы, обновляются при создании и удалении постов."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    authors_count = models.PositiveIntegerField('Авторов', default=0)
+    last_activity = models.DateTimeField(
+        'Последняя запись', blank=True, null=True
+    )
+
+
+class FeedCounter(models.Model):
+    """Число постов всей ленты или автора (posts.counts).
+
+    Ленты групп считаются в GroupStats.
+    """
+    key = models.CharField('Лента', max_length=50, primary_key=True)
+    posts_count = models.IntegerField('Постов', default=0)
+
+
+class PageVersion(models.Model):
+    """Время последнего изменения данных страниц (posts.conditional)."""
+    key = models.CharField('Ключ', max_length=50, primary_key=True)
+    changed = models.DateTimeField('Изменено')
+
 
 class Post(models.Model):
     text = models.TextField('Текст')
@@ -42,6 +78,15 @@ class Post(models.Model):
 
     class Meta:
         ordering = ['-pub_date', '-pk']
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'], name='post_feed_idx'),
+            models.Index(
+                fields=['author', '-pub_date', '-id'], name='post_author_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'], name='post_group_idx'
+            ),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -61,12 +106,22 @@ class Comment(models.Model):
         related_name='comments',
         verbose_name='Комментарий'
     )
+    # id записи журнала posts.comment_buffer: повторный перенос той же
+    # записи после сбоя не создаёт дубль
+    buffer_id = models.UUIDField(
+        'Запись буфера', null=True, unique=True, editable=False
+    )
 
     def __str__(self):
         return self.text
 
     class Meta:
         ordering = ['-created', '-pk']
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'], name='comment_post_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -89,3 +144,104 @@ class Follow(models.Model):
                 fields=['user', 'author'], name='unique_pair'
             ),
         ]
+        indexes = [
+            models.Index(fields=['author', '-id'], name='follow_author_idx'),
+            models.Index(fields=['user', '-id'], name='follow_user_idx'),
+        ]
+
+
+class FollowCounter(models.Model):
+    """Число подписчиков и подписок, обновляется при (от)писке."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='follow_counter',
+        verbose_name='Пользователь'
+    )
+    followers = models.PositiveIntegerField('Подписчики', default=0)
+    following = models.PositiveIntegerField('Подписки', default=0)
+
+
+class TrendingScore(models.Model):
+    """Затухающий счёт поста или группы (posts.trending)."""
+    kind = models.CharField('Что', max_length=10)
+    item_id = models.PositiveIntegerField('id')
+    score = models.FloatField('Счёт')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'item_id'], name='unique_trending_item'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['kind', '-score'], name='trending_top_idx'),
+        ]
+
+
+class Recommendation(models.Model):
+    """Автор, на которого стоит подписаться (posts.recommendations)."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    rank = models.PositiveSmallIntegerField('Место')
+    expires_at = models.DateTimeField('Действует до')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'rank'], name='recommendation_user_idx'
+            ),
+        ]
+
+
+class Notification(models.Model):
+    """Событие для письма-дайджеста: новый подписчик или комментарий."""
+    FOLLOW = 'follow'
+    COMMENT = 'comment'
+    KINDS = (
+        (FOLLOW, 'Подписка'),
+        (COMMENT, 'Комментарий'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Кто'
+    )
+    kind = models.CharField('Событие', max_length=10, choices=KINDS)
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Комментарий'
+    )
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent = models.DateTimeField('Отправлено', blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['sent', 'recipient', 'id'],
+                name='notification_queue_idx',
+            ),
+        ]
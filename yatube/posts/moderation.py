@@ -0,0 +1,119 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from sorl.thumbnail import delete as delete_image
+
+from . import conditional, counts, group_stats
+from .models import Comment, Notification, Post
+
+CHUNK_SIZE = 1000
+
+
+def _chunks(queryset, chunk_size=CHUNK_SIZE):
+    """Пачки (pk, author_id, group_id, image) по возрастанию pk."""
+    last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', 'author_id', 'group_id', 'image'
+            )[:chunk_size]
+        )
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        yield rows
+
+
+def _feed_keys(author_ids, group_ids):
+    # версия автора входит и в валидаторы страниц его постов, так что
+    # отдельные ключи постов трогать не нужно
+    keys = [counts.INDEX_KEY]
+    keys += [counts.author_key(pk) for pk in author_ids]
+    keys += [counts.group_key(pk) for pk in group_ids if pk]
+    return keys
+
+
+def _invalidate(author_ids, group_ids):
+    """Пересчитывает агрегаты групп и версии один раз на операцию."""
+    group_stats.refresh(group_ids)
+    conditional.touch(_feed_keys(author_ids, group_ids))
+
+
+def _delete(queryset):
+    """Один DELETE по выборке: без сборщика каскадов и сигналов на объект."""
+    model = queryset.model
+    quote = connection.ops.quote_name
+    select, params = queryset.values('pk').query.sql_with_params()
+    pk = quote(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        # вложенный подзапрос: MySQL не даёт выбирать из удаляемой таблицы
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} WHERE {pk} IN '
+            f'(SELECT {pk} FROM ({select}) AS ids)',
+            params,
+        )
+        return cursor.rowcount
+
+
+def delete_posts(queryset, chunk_size=CHUNK_SIZE):
+    """Удаляет посты и их комментарии DELETE-ом на пачку, без сигналов."""
+    deleted, author_ids, group_ids, images = 0, set(), set(), []
+    deltas = Counter()
+    for rows in _chunks(queryset, chunk_size):
+        pks = [row[0] for row in rows]
+        with transaction.atomic():
+            # комментарии и уведомления о них удаляем так же явно
+            comments = Comment.objects.filter(post_id__in=pks)
+            _delete(Notification.objects.filter(
+                comment_id__in=comments.values('pk')
+            ))
+            _delete(comments)
+            deleted += _delete(Post.objects.filter(pk__in=pks))
+        author_ids.update(row[1] for row in rows)
+        group_ids.update(row[2] for row in rows)
+        images.extend(row[3] for row in rows if row[3])
+        deltas[counts.INDEX_KEY] -= len(rows)
+        deltas.subtract(counts.author_key(row[1]) for row in rows)
+    _delete_files(images)
+    counts.change_counts(deltas)
+    _invalidate(author_ids, group_ids)
+    return deleted
+
+
+def delete_by_authors(author_ids, chunk_size=CHUNK_SIZE):
+    return delete_posts(
+        Post.objects.filter(author_id__in=author_ids), chunk_size
+    )
+
+
+def move_to_group(queryset, group, chunk_size=CHUNK_SIZE):
+    moved, author_ids, group_ids = 0, set(), {getattr(group, 'pk', None)}
+    for rows in _chunks(queryset, chunk_size):
+        pks = [row[0] for row in rows]
+        with transaction.atomic():
+            moved += Post.objects.filter(pk__in=pks).update(group=group)
+        author_ids.update(row[1] for row in rows)
+        group_ids.update(row[2] for row in rows)
+    _invalidate(author_ids, group_ids)
+    return moved
+
+
+def purge_images(queryset, chunk_size=CHUNK_SIZE):
+    purged, images, author_ids, group_ids = 0, [], set(), set()
+    for rows in _chunks(queryset.exclude(image=''), chunk_size):
+        with transaction.atomic():
+            purged += Post.objects.filter(
+                pk__in=[row[0] for row in rows]
+            ).update(image='')
+        images.extend(row[3] for row in rows)
+        author_ids.update(row[1] for row in rows)
+        group_ids.update(row[2] for row in rows)
+    _delete_files(images)
+    conditional.touch(_feed_keys(author_ids, group_ids))
+    return purged
+
+
+def _delete_files(names):
+    # вместе с файлом удаляются его миниатюры и записи о них sorl
+    for name in names:
+        delete_image(name)
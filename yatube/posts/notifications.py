@@ -0,0 +1,126 @@
+from datetime import datetime, timezone as dt_timezone
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from core.tasks import task
+from .models import Notification, Post
+
+# Сколько получателей собирается в одну пачку писем
+BATCH_SIZE = 200
+
+
+def schedule_digest(now=None):
+    """Ставит рассылку на конец текущего интервала DIGEST_INTERVAL.
+
+    Ключ задачи - номер интервала, поэтому все события интервала дают
+    одну задачу; флаг в кэше избавляет от лишних INSERT в очередь.
+    """
+    interval = settings.DIGEST_INTERVAL
+    now = timezone.now() if now is None else now
+    slot = int(now.timestamp() // interval)
+    key = f'notifications-digest:{slot}'
+    if not cache.add(key, True, interval):
+        return
+    send_digests.delay(
+        key=key,
+        run_at=datetime.fromtimestamp((slot + 1) * interval, dt_timezone.utc),
+    )
+
+
+def notify_follow(follower, author):
+    Notification.objects.create(
+        recipient=author, actor=follower, kind=Notification.FOLLOW
+    )
+    schedule_digest()
+
+
+def notify_comments(comments):
+    post_authors = dict(Post.objects.filter(
+        pk__in={comment.post_id for comment in comments}
+    ).values_list('pk', 'author_id'))
+    notifications = [
+        Notification(
+            recipient_id=post_authors[comment.post_id],
+            actor_id=comment.author_id,
+            kind=Notification.COMMENT,
+            comment_id=comment.pk,
+        )
+        for comment in comments
+        if post_authors.get(comment.post_id, comment.author_id)
+        != comment.author_id
+    ]
+    if notifications:
+        Notification.objects.bulk_create(notifications)
+        schedule_digest()
+
+
+def digest_text(recipient, notifications):
+    followers = [
+        item.actor.username for item in notifications
+        if item.kind == Notification.FOLLOW
+    ]
+    comments = [
+        item for item in notifications if item.kind == Notification.COMMENT
+    ]
+    lines = [f'Здравствуйте, {recipient.username}!', '']
+    if followers:
+        lines.append('Новые подписчики: ' + ', '.join(followers))
+    if comments:
+        lines.append('Новые комментарии:')
+        lines.extend(
+            f'- {item.actor.username} к посту «{item.comment.post.text[:30]}»:'
+            f' {item.comment.text[:200]}'
+            for item in comments if item.comment is not None
+        )
+    return '\n'.join(lines)
+
+
+def _messages(notifications):
+    for recipient_id, items in groupby(
+        notifications, key=lambda item: item.recipient_id
+    ):
+        items = list(items)
+        recipient = items[0].recipient
+        if recipient.email:
+            yield EmailMessage(
+                subject='Yatube: новые подписчики и комментарии',
+                body=digest_text(recipient, items),
+                to=[recipient.email],
+            )
+
+
+@task
+def send_digests(batch_size=BATCH_SIZE):
+    """Отправляет по письму на пользователя со всеми его событиями.
+
+    Все письма уходят через одно соединение с почтовым сервером.
+    Возвращает число отправленных писем.
+    """
+    sent = 0
+    with get_connection() as connection:
+        while True:
+            recipient_ids = list(
+                Notification.objects.filter(sent__isnull=True)
+                .order_by('recipient_id')
+                .values_list('recipient_id', flat=True)
+                .distinct()[:batch_size]
+            )
+            if not recipient_ids:
+                return sent
+            notifications = list(
+                Notification.objects.filter(
+                    sent__isnull=True, recipient_id__in=recipient_ids
+                ).select_related(
+                    'recipient', 'actor', 'comment__post'
+                ).order_by('recipient_id', 'pk')
+            )
+            messages = list(_messages(notifications))
+            if messages:
+                sent += connection.send_messages(messages) or 0
+            Notification.objects.filter(
+                pk__in=[item.pk for item in notifications]
+            ).update(sent=timezone.now())
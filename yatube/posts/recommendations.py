@@ -0,0 +1,104 @@
+import heapq
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import conditional
+from .following import following_set
+from .models import Follow, Post, Recommendation, User
+
+RECOMMENDATIONS_TTL = 24 * 60 * 60
+RECOMMENDATIONS_LIMIT = 5
+BATCH_SIZE = 1000
+# общая группа весит меньше общего знакомого
+GROUP_WEIGHT = 0.5
+# в огромных группах соседство ничего не говорит о вкусах
+MAX_GROUP_AUTHORS = 1000
+
+
+def load_graph():
+    """Граф подписок и авторов групп в виде словарей множеств id."""
+    following = defaultdict(set)
+    for user_id, author_id in Follow.objects.values_list(
+        'user_id', 'author_id'
+    ).iterator():
+        following[user_id].add(author_id)
+    group_authors = defaultdict(set)
+    author_groups = defaultdict(set)
+    for group_id, author_id in Post.objects.filter(
+        group__isnull=False
+    ).values_list('group_id', 'author_id').distinct().iterator():
+        group_authors[group_id].add(author_id)
+        author_groups[author_id].add(group_id)
+    return following, group_authors, author_groups
+
+
+def score_candidates(user_id, following, group_authors, author_groups):
+    """Друзья друзей плюс соавторы общих групп, без уже подписанных."""
+    scores = Counter()
+    for friend_id in following.get(user_id, ()):
+        scores.update(following.get(friend_id, ()))
+    for group_id in author_groups.get(user_id, ()):
+        authors = group_authors[group_id]
+        if len(authors) <= MAX_GROUP_AUTHORS:
+            for author_id in authors:
+                scores[author_id] += GROUP_WEIGHT
+    scores.pop(user_id, None)
+    for author_id in following.get(user_id, ()):
+        scores.pop(author_id, None)
+    return heapq.nlargest(
+        RECOMMENDATIONS_LIMIT,
+        scores,
+        key=lambda author_id: (scores[author_id], -author_id),
+    )
+
+
+def build_recommendations(batch_size=BATCH_SIZE, ttl=RECOMMENDATIONS_TTL):
+    """Пересчитывает рекомендации всех пользователей пачками.
+
+    Рекомендации пачки заменяются целиком: у кого их не осталось,
+    прежние тоже удаляются.
+    """
+    graph = load_graph()
+    user_ids = User.objects.order_by('pk').values_list(
+        'pk', flat=True
+    ).iterator()
+    expires_at = timezone.now() + timedelta(seconds=ttl)
+    stored = 0
+    while True:
+        batch = list(islice(user_ids, batch_size))
+        if not batch:
+            conditional.touch([conditional.RECOMMENDATIONS_KEY])
+            return stored
+        suggestions = {
+            user_id: score_candidates(user_id, *graph) for user_id in batch
+        }
+        with transaction.atomic():
+            Recommendation.objects.filter(user_id__in=batch).delete()
+            Recommendation.objects.bulk_create(
+                Recommendation(
+                    user_id=user_id,
+                    author_id=author_id,
+                    rank=rank,
+                    expires_at=expires_at,
+                )
+                for user_id, ids in suggestions.items()
+                for rank, author_id in enumerate(ids)
+            )
+        stored += sum(1 for ids in suggestions.values() if ids)
+
+
+def recommendations_for(user):
+    """Готовые рекомендации [(id, username)]: один запрос по индексу."""
+    if not user.is_authenticated:
+        return []
+    following = following_set(user)
+    rows = Recommendation.objects.filter(
+        user=user, expires_at__gt=timezone.now()
+    ).order_by('rank').values_list('author_id', 'author__username')
+    return [
+        (pk, username) for pk, username in rows if pk not in following
+    ]
@@ -0,0 +1,31 @@
+import re
+
+from django.db import connection
+
+_TOKEN = re.compile(r'\w+')
+
+
+def fts_query(term):
+    """Строка поиска в запрос FTS5: каждое слово - префикс, через AND."""
+    return ' '.join(f'"{token}"*' for token in _TOKEN.findall(term))
+
+
+def search_posts(queryset, term):
+    """Фильтрует посты по тексту через индекс FTS5, иначе - icontains."""
+    query = fts_query(term)
+    if not query:
+        return queryset
+    if connection.vendor != 'sqlite':
+        for token in _TOKEN.findall(term):
+            queryset = queryset.filter(text__icontains=token)
+        return queryset
+    # не pk__in=RawSQL(...): Django берёт подзапрос во вторые скобки,
+    # и SQLite читает IN ((SELECT ...)) как скалярный - первую строку
+    pk = '{}.{}'.format(
+        connection.ops.quote_name(queryset.model._meta.db_table),
+        connection.ops.quote_name(queryset.model._meta.pk.column),
+    )
+    return queryset.extra(where=[
+        f'{pk} IN (SELECT rowid FROM posts_post_fts '
+        'WHERE posts_post_fts MATCH %s)'
+    ], params=[query])
@@ -0,0 +1,132 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import (
+    conditional, counts, following, group_stats, notifications, trending
+)
+from .events import broker
+from .models import Comment, Follow, Group, Post, User
+
+# Пакетные сигналы: одиночное сохранение шлёт их со списком из одного
+# объекта, массовый импорт - один раз на пачку. Счётчики и кэши
+# подписываются только на них, поэтому обновляются один раз на пачку.
+posts_created = Signal(providing_args=['posts'])
+comments_created = Signal(providing_args=['comments'])
+# Поля пользователя, которые видны на страницах рядом с его постами
+PROFILE_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        posts_created.send(sender=Post, posts=[instance])
+        return
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if old_group_id != instance.group_id:
+        group_stats.refresh([old_group_id, instance.group_id])
+        if old_group_id:
+            conditional.touch([counts.group_key(old_group_id)])
+    conditional.touch_posts([instance])
+
+
+@receiver(pre_save, sender=Post)
+def post_group_changed(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    old_group_id = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', flat=True
+    ).first()
+    instance._old_group_id = old_group_id
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counts.count_posts([instance], sign=-1)
+    group_stats.posts_removed([instance])
+    conditional.touch_posts([instance])
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        comments_created.send(sender=Comment, comments=[instance])
+
+
+def _follow_changed(follow, delta):
+    following.change_follow_counts(follow.user_id, follow.author_id, delta)
+    following.invalidate(follow.user_id)
+    conditional.touch([
+        conditional.follow_key(follow.user_id),
+        conditional.follow_key(follow.author_id),
+    ])
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _follow_changed(instance, 1)
+        notifications.notify_follow(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    _follow_changed(instance, -1)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        conditional.touch([counts.group_key(instance.pk)])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, update_fields=None,
+               **kwargs):
+    # вход в систему сохраняет только last_login, имён он не меняет
+    if raw or created or (
+        update_fields and not set(update_fields) & PROFILE_FIELDS
+    ):
+        return
+    conditional.touch([conditional.PROFILES_KEY])
+
+
+@receiver(posts_created)
+def publish_new_posts(sender, posts, **kwargs):
+    if not broker.has_subscribers:
+        return
+    usernames = dict(
+        User.objects.filter(
+            pk__in={post.author_id for post in posts}
+        ).values_list('pk', 'username')
+    )
+    broker.publish([
+        {
+            'id': post.pk,
+            'author_id': post.author_id,
+            'author': usernames.get(post.author_id),
+        }
+        for post in posts
+    ])
+
+
+@receiver(posts_created)
+def count_new_posts(sender, posts, **kwargs):
+    counts.count_posts(posts)
+    group_stats.posts_added(posts)
+    trending.posts_added(posts)
+    conditional.touch_posts(posts)
+
+
+@receiver(comments_created)
+def score_new_comments(sender, comments, **kwargs):
+    trending.comments_added(comments)
+    conditional.touch(
+        {conditional.post_key(comment.post_id) for comment in comments}
+    )
+
+
+@receiver(comments_created)
+def notify_new_comments(sender, comments, **kwargs):
+    notifications.notify_comments(comments)
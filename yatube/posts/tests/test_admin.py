@@ -0,0 +1,191 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+
+from ..models import Comment, Group, GroupStats, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostAdminActionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def action(self, action, posts, **extra):
+        data = {
+            'action': action,
+            '_selected_action': [post.pk for post in posts],
+            'index': 0,
+        }
+        data.update(extra)
+        return self.client.post(self.url, data)
+
+    def test_delete_by_author(self):
+        """Удаляются все посты и комментарии автора выбранного поста."""
+        spam = [
+            Post.objects.create(
+                author=self.spammer, text=f'Спам {i}', group=self.group
+            )
+            for i in range(3)
+        ]
+        Comment.objects.create(author=self.user, post=spam[1], text='Ответ')
+        Post.objects.create(author=self.user, text='Обычный пост')
+        self.action('delete_by_author', spam[:1])
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).posts_count, 0
+        )
+
+    def test_move_to_group_requires_group(self):
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group
+        )
+        response = self.action('move_to_group', [post], group='')
+        post.refresh_from_db()
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(
+            [str(message) for message in get_messages(response.wsgi_request)],
+            ['Выберите группу'],
+        )
+
+    def test_move_to_group_and_purge_images(self):
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост',
+            image=SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        thumbnail = get_thumbnail(post.image, '10x10')
+        self.action('move_to_group', [post], group=self.group.pk)
+        post.refresh_from_db()
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).posts_count, 1
+        )
+        storage = post.image.storage
+        name = post.image.name
+        self.action('purge_images', [post])
+        post.refresh_from_db()
+        self.assertFalse(post.image)
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(storage.exists(thumbnail.name))
+
+
+class PostAdminChangelistTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        Post.objects.create(author=cls.admin, text='Длинная история о котах')
+        Post.objects.create(author=cls.admin, text='Заметки про собак')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def test_search_uses_prefixes(self):
+        """Поиск находит пост по началу слова и не находит лишнее."""
+        response = self.client.get(self.url, {'q': 'ист кот'})
+        self.assertEqual(response.status_code, 200)
+        posts = list(response.context['cl'].result_list)
+        self.assertEqual([post.text for post in posts],
+                         ['Длинная история о котах'])
+
+    def test_search_follows_updates(self):
+        post = Post.objects.get(text='Заметки про собак')
+        post.text = 'Заметки про ежей'
+        post.save()
+        response = self.client.get(self.url, {'q': 'ежей'})
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+        response = self.client.get(self.url, {'q': 'собак'})
+        self.assertFalse(response.context['cl'].result_list)
+
+    @override_settings(EXACT_COUNT_LIMIT=1)
+    def test_filtered_count_is_exact(self):
+        Post.objects.create(author=self.admin, text='Ещё про котов')
+        Post.objects.create(author=self.admin, text='Кот учёный')
+        response = self.client.get(self.url, {'q': 'кот'})
+        self.assertEqual(response.context['cl'].result_count, 3)
+        self.assertEqual(len(response.context['cl'].result_list), 3)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(author=self.admin, text=f'Пост {i}', group=group)
+            for i in range(30)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['cl'].formset.forms), 32)
+        sql = [query['sql'] for query in queries.captured_queries]
+        # список для строк и список в форме действий
+        self.assertEqual(
+            sum(query.endswith('FROM "posts_group"') for query in sql), 2
+        )
+        self.assertFalse([query for query in sql if 'DISTINCT' in query])
+
+    def test_date_hierarchy(self):
+        post = Post.objects.first()
+        response = self.client.get(self.url, {
+            'pub_date__year': post.pub_date.year,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_date_hierarchy_lists_years_and_months(self):
+        old = Post.objects.last()
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=old.pub_date.replace(year=2020, month=3)
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, '?pub_date__year=2020')
+        self.assertNotContains(response, '?pub_date__year=2021')
+        response = self.client.get(self.url, {'pub_date__year': 2020})
+        self.assertContains(response, 'pub_date__month=3')
+        self.assertNotContains(response, 'pub_date__month=4')
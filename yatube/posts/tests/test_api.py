@@ -0,0 +1,215 @@
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..bulk import MAX_ERRORS, BulkImporter
+from ..models import Comment, Follow, Group, Post
+from ..signals import posts_created
+
+User = get_user_model()
+
+
+class PostApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост {i}', group=cls.group)
+            for i in range(13)
+        )
+        cls.post = Post.objects.first()
+        Comment.objects.create(
+            text='Тестовый комментарий', author=cls.user, post=cls.post
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_feeds_use_keyset_cursor(self):
+        """Лента отдаётся страницами по курсору без повторов."""
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('posts:api_profile', kwargs={'username': 'author'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url).json()
+                self.assertEqual(len(first['results']), 10)
+                second = self.guest_client.get(
+                    url, {'cursor': first['next']}
+                ).json()
+                self.assertEqual(len(second['results']), 3)
+                self.assertIsNone(second['next'])
+                ids = [row['id'] for row in first['results']]
+                ids += [row['id'] for row in second['results']]
+                self.assertEqual(len(set(ids)), 13)
+
+    def test_post_detail_contains_comments(self):
+        response = self.guest_client.get(
+            reverse('posts:api_post_detail', kwargs={'post_id': self.post.pk})
+        )
+        data = response.json()
+        self.assertEqual(data['author'], 'author')
+        self.assertEqual(data['comments'][0]['text'], 'Тестовый комментарий')
+
+    def test_unknown_objects_return_json_404(self):
+        urls = (
+            reverse('posts:api_group_posts', kwargs={'slug': 'missing'}),
+            reverse('posts:api_profile', kwargs={'username': 'missing'}),
+            reverse('posts:api_post_detail', kwargs={'post_id': 0}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json(), {'detail': 'not found'})
+
+    def test_etag_returns_not_modified(self):
+        url = reverse('posts:api_index')
+        response = self.guest_client.get(url)
+        etag = response['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_follow_feed_requires_auth(self):
+        url = reverse('posts:api_follow_index')
+        self.assertEqual(self.guest_client.get(url).status_code, 401)
+        Follow.objects.create(user=self.user, author=self.author)
+        data = self.authorized_client.get(url).json()
+        self.assertEqual(len(data['results']), 10)
+
+
+class BulkImportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_bulk_endpoint_validates_and_creates(self):
+        """Валидные строки сохраняются, ошибки возвращаются с номером."""
+        lines = [
+            {'type': 'post', 'text': 'Первый', 'group': 'test-slug'},
+            {'type': 'post', 'text': ''},
+            {'type': 'post', 'text': 'Второй', 'group': 'no-such-group'},
+            {'type': 'comment', 'post': self.post.pk, 'text': 'Коммент'},
+        ]
+        body = '\n'.join(json.dumps(line) for line in lines) + '\nnot json'
+        response = self.authorized_client.post(
+            reverse('posts:api_bulk_import'),
+            data=body,
+            content_type='application/x-ndjson',
+        )
+        data = response.json()
+        self.assertEqual(data['posts'], 1)
+        self.assertEqual(data['comments'], 1)
+        self.assertEqual(
+            [error['line'] for error in data['errors']], [2, 3, 5]
+        )
+        self.assertTrue(
+            Post.objects.filter(text='Первый', group=self.group).exists()
+        )
+
+    def test_importer_keeps_first_errors_and_own_pks(self):
+        """Ошибки постов находятся позже, но в отчёт попадают первые строки;
+        pk берутся у своих строк, а не у последних в таблице."""
+        lines = [json.dumps({'text': 'Свой', 'group': 'no-such-group'})]
+        lines += ['not json'] * MAX_ERRORS
+        lines.append(json.dumps({'text': 'Импорт'}))
+        bulk_create = Post.objects.bulk_create
+        saved = []
+
+        def concurrent_insert(objs, *args, **kwargs):
+            created = bulk_create(objs, *args, **kwargs)
+            Post.objects.create(author=self.user, text='Чужой')
+            return created
+
+        def receiver(sender, posts, **kwargs):
+            saved.extend(posts)
+
+        posts_created.connect(receiver)
+        self.addCleanup(posts_created.disconnect, receiver)
+        with mock.patch.object(Post.objects, 'bulk_create', concurrent_insert):
+            stats = BulkImporter(author=self.user).feed(lines)
+        self.assertEqual(
+            [error['line'] for error in stats['errors']],
+            list(range(1, MAX_ERRORS + 1)),
+        )
+        imported = [post for post in saved if post.text == 'Импорт']
+        self.assertEqual(
+            imported[0].pk, Post.objects.get(text='Импорт').pk
+        )
+
+    def test_import_posts_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as stream:
+            for i in range(5):
+                stream.write(json.dumps({'text': f'Импорт {i}'}) + '\n')
+            stream.flush()
+            call_command(
+                'import_posts', stream.name,
+                author='auth', chunk_size=2, stdout=StringIO()
+            )
+        self.assertEqual(
+            Post.objects.filter(text__startswith='Импорт').count(), 5
+        )
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}') for i in range(5)
+        )
+        Post.objects.create(author=cls.author, text='Чужой пост')
+        Comment.objects.create(
+            author=cls.user, post=Post.objects.first(), text='Коммент'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def test_export_streams_own_data(self):
+        """Выгрузка содержит только данные текущего пользователя."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('posts:export_data'))
+        self.assertTrue(response.streaming)
+        records = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        types = [record['type'] for record in records]
+        self.assertEqual(types, ['post'] * 5 + ['comment', 'follow'])
+
+    def test_export_command_chunks_csv(self):
+        out = StringIO()
+        call_command('export_posts', format='csv', chunk_size=2, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], 'type,id,date,author,text,group,post,user')
+        self.assertEqual(len(lines), 1 + 6 + 1 + 1)
@@ -0,0 +1,93 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import comment_buffer
+from ..models import Comment, Post
+
+User = get_user_model()
+TEMP_BUFFER_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(COMMENT_BUFFER=True, COMMENT_BUFFER_DIR=TEMP_BUFFER_DIR)
+class CommentBufferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_BUFFER_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(TEMP_BUFFER_DIR, ignore_errors=True)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+
+    def test_comment_is_buffered_then_flushed(self):
+        """Комментарий сразу виден автору, в базу попадает при flush."""
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Из буфера'},
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.assertContains(self.authorized_client.get(self.url), 'Из буфера')
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        self.assertNotContains(reader_client.get(self.url), 'Из буфера')
+
+        self.assertEqual(comment_buffer.flush(), 1)
+        comment = Comment.objects.get()
+        self.assertEqual(
+            (comment.text, comment.author, comment.post),
+            ('Из буфера', self.user, self.post),
+        )
+        self.assertFalse(comment_buffer.pending(self.post.pk, self.user))
+        self.assertEqual(comment_buffer.flush(), 0)
+
+    def test_flush_in_chunks_skips_missing_posts(self):
+        for i in range(5):
+            comment_buffer.append(self.post.pk, self.user, f'Ответ {i}')
+        comment_buffer.append(self.post.pk + 100, self.user, 'В пустоту')
+        self.assertEqual(comment_buffer.flush(chunk_size=2), 5)
+        self.assertEqual(Comment.objects.count(), 5)
+
+    def test_flush_after_crash_does_not_duplicate(self):
+        """Пачка, сохранённая до падения, при повторе не дублируется."""
+        records = [
+            comment_buffer.append(self.post.pk, self.user, f'Ответ {i}')
+            for i in range(3)
+        ]
+        with mock.patch.object(
+            comment_buffer, '_forget', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                comment_buffer.flush(chunk_size=2)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(comment_buffer.flush(chunk_size=2), 1)
+        self.assertEqual(Comment.objects.count(), 3)
+        comment = Comment.objects.get(text='Ответ 0')
+        self.assertEqual(comment.created.isoformat(), records[0]['created'])
+
+    def test_flush_in_other_process_hides_pending(self):
+        """flush из другого процесса не чистит кэш веб-процесса."""
+        comment_buffer.append(self.post.pk, self.user, 'Один раз')
+        with mock.patch.object(comment_buffer, '_forget'):
+            comment_buffer.flush()
+        self.assertEqual(comment_buffer.pending(self.post.pk, self.user), [])
+        response = self.authorized_client.get(self.url)
+        self.assertContains(response, 'Один раз', count=1)
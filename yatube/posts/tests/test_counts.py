@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Task
+from core.tasks import run_pending
+from .. import counts, moderation
+from ..models import FeedCounter, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(EXACT_COUNT_LIMIT=5)
+class ApproximateCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(8):
+            Post.objects.create(
+                author=cls.user, text=f'Пост {i}', group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_small_feed_is_exact(self):
+        """Лента меньше порога считается точно."""
+        Post.objects.filter(pk__in=Post.objects.all()[:4]).delete()
+        paginator = counts.ApproximatePaginator(
+            Post.objects.all(), 10, counts.INDEX_KEY
+        )
+        self.assertEqual(paginator.count, 4)
+        self.assertFalse(paginator.approximate)
+
+    def test_large_feed_uses_maintained_counter(self):
+        paginator = counts.ApproximatePaginator(
+            Post.objects.all(), 10, counts.INDEX_KEY
+        )
+        self.assertEqual(paginator.count, 8)
+        self.assertTrue(paginator.approximate)
+        Post.objects.create(author=self.user, text='Ещё пост')
+        Post.objects.first().delete()
+        Post.objects.create(author=self.user, text='И ещё пост')
+        self.assertEqual(counts.feed_count(counts.INDEX_KEY), 9)
+
+    def test_bulk_deletion_and_refresh_fix_counters(self):
+        pks = Post.objects.order_by('pk').values_list('pk', flat=True)
+        moderation.delete_posts(Post.objects.filter(pk__in=list(pks[1:7])))
+        Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(counts.feed_count(counts.INDEX_KEY), 3)
+        self.assertEqual(counts.feed_count(counts.author_key(self.user.pk)), 3)
+        # дрейф счётчика исправляет периодический пересчёт
+        FeedCounter.objects.filter(key=counts.INDEX_KEY).update(
+            posts_count=100
+        )
+        self.assertEqual(counts.refresh_index_count(), 3)
+
+    def test_missing_counter_is_recounted_in_background(self):
+        """Без счётчика страница не ждёт COUNT(*), его считает задача."""
+        key = counts.author_key(self.user.pk)
+        FeedCounter.objects.filter(key=key).delete()
+        paginator = counts.ApproximatePaginator(
+            self.user.posts.all(), 10, key
+        )
+        self.assertEqual(paginator.count, 6)
+        self.assertTrue(paginator.approximate)
+        self.assertIsNone(counts.feed_count(key))
+        self.assertEqual(Task.objects.count(), 1)
+        run_pending()
+        self.assertEqual(counts.feed_count(key), 8)
+
+    def test_group_change_moves_counter(self):
+        key = counts.group_key(self.group.pk)
+        self.assertEqual(counts.feed_count(key), 8)
+        post = self.group.posts.first()
+        post.group = None
+        post.save()
+        self.assertEqual(counts.feed_count(key), 7)
+
+    def test_profile_labels_approximate_total(self):
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': 'auth'})
+        )
+        self.assertTrue(response.context['count_approximate'])
+        self.assertContains(response, '&asymp;8')
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.asgi import AsgiBridge
+from .. import asgi, events
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+class PostEventsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_new_post_is_pushed(self):
+        """Новый пост приходит подписчику потока событий."""
+        response = self.client.get(reverse('posts:post_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = iter(response.streaming_content)
+        self.assertEqual(next(stream), b'retry: 5000\n\n')
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertIn(f'id: {post.pk}'.encode(), next(stream))
+        response.close()
+
+    def test_follow_stream_skips_strangers(self):
+        response = self.authorized_client.get(
+            reverse('posts:post_events'), {'feed': 'follow'}
+        )
+        stream = iter(response.streaming_content)
+        next(stream)
+        Post.objects.create(author=self.stranger, text='Чужой пост')
+        post = Post.objects.create(author=self.author, text='Пост автора')
+        message = next(stream)
+        self.assertIn(f'id: {post.pk}'.encode(), message)
+        self.assertIn(b'"author":"author"', message)
+        response.close()
+
+    def test_follow_stream_requires_auth(self):
+        response = self.client.get(
+            reverse('posts:post_events'), {'feed': 'follow'}
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class AsgiBridgeTest(TestCase):
+    def setUp(self):
+        self.application = AsgiBridge(
+            WSGIHandler(),
+            routes={'/events/': asgi.post_events},
+            max_workers=2,
+        )
+
+    def request(self, path, on_message=lambda message: False):
+        """Выполняет GET через ASGI; on_message решает, когда отключиться."""
+        messages = []
+
+        async def run():
+            disconnected = asyncio.Event()
+
+            async def receive():
+                if not messages:
+                    return {'type': 'http.request'}
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                messages.append(message)
+                if on_message(message):
+                    disconnected.set()
+
+            scope = {
+                'type': 'http',
+                'method': 'GET',
+                'path': path,
+                'query_string': b'',
+                'headers': [(b'host', b'testserver')],
+            }
+            await asyncio.wait_for(
+                self.application(scope, receive, send), timeout=5
+            )
+
+        asyncio.run(run())
+        return messages
+
+    def test_wsgi_views_run_in_pool(self):
+        """Обычные страницы отдаются через пул потоков."""
+        messages = self.request('/about/author/', lambda message: False)
+        self.assertEqual(messages[0]['status'], 200)
+        body = b''.join(message.get('body', b'') for message in messages)
+        self.assertIn(b'<html', body)
+
+    def test_events_are_served_by_coroutine(self):
+        def on_message(message):
+            body = message.get('body', b'')
+            if body.startswith(b'retry'):
+                events.broker.publish(
+                    [{'id': 1, 'author_id': 1, 'author': 'auth'}]
+                )
+            return body.startswith(b'id: 1')
+
+        messages = self.request('/events/', on_message)
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertIn(b'"author":"auth"', messages[-1]['body'])
+
+    def test_stream_is_read_in_one_thread(self):
+        """Тело ответа читается в том же потоке, где вызвано приложение."""
+        threads = []
+
+        def body():
+            for chunk in (b'a', b'b', b'c'):
+                threads.append(threading.get_ident())
+                yield chunk
+
+        def application(environ, start_response):
+            threads.append(threading.get_ident())
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return body()
+
+        self.application = AsgiBridge(application, max_workers=4)
+        messages = self.request('/')
+        body_parts = b''.join(message.get('body', b'') for message in messages)
+        self.assertEqual(body_parts, b'abc')
+        self.assertEqual(len(set(threads)), 1)
@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..following import following_set
+from ..models import Follow, FollowCounter
+
+User = get_user_model()
+
+
+class FollowingSetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(5)
+        ]
+        for author in cls.authors[::2]:
+            Follow.objects.create(user=cls.user, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_checks_cost_no_queries(self):
+        """Проверки подписки после загрузки не обращаются к БД."""
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            following = following_set(user)
+        with self.assertNumQueries(0):
+            flags = [author.pk in following for author in self.authors]
+            # другой объект того же пользователя берёт массив из кэша
+            following_set(User(pk=user.pk))
+        self.assertEqual(flags, [True, False, True, False, True])
+
+    def test_follow_views_invalidate_cache(self):
+        author = self.authors[1]
+        following_set(User.objects.get(pk=self.user.pk))
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': author})
+        )
+        self.assertIn(
+            author.pk, following_set(User.objects.get(pk=self.user.pk))
+        )
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': author})
+        )
+        self.assertNotIn(
+            author.pk, following_set(User.objects.get(pk=self.user.pk))
+        )
+
+
+class FollowListsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(25)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_follow_views(self):
+        """Счётчики обновляются при подписке и отписке."""
+        client = Client()
+        for reader in self.readers[:3]:
+            client.force_login(reader)
+            client.get(reverse(
+                'posts:profile_follow', kwargs={'username': 'author'}
+            ))
+        client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}
+        ))
+        client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}
+        ))
+        counter = FollowCounter.objects.get(user=self.author)
+        self.assertEqual(counter.followers, 2)
+        self.assertEqual(
+            FollowCounter.objects.get(user=self.readers[0]).following, 1
+        )
+        response = client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        self.assertEqual(response.context['followers_count'], 2)
+
+    def test_orm_and_cascade_changes_update_counts(self):
+        """Подписки вне views (админка, каскад) тоже меняют счётчики."""
+        reader = self.readers[0]
+        self.assertNotIn(self.author.pk, following_set(reader))
+        Follow.objects.create(user=reader, author=self.author)
+        reader = User.objects.get(pk=reader.pk)
+        self.assertIn(self.author.pk, following_set(reader))
+        Follow.objects.create(user=self.readers[1], author=self.author)
+        User.objects.get(pk=self.readers[1].pk).delete()
+        self.assertEqual(
+            FollowCounter.objects.get(user=self.author).followers, 1
+        )
+
+    def test_followers_list_keyset_pages(self):
+        for reader in self.readers:
+            Follow.objects.create(user=reader, author=self.author)
+        url = reverse('posts:followers', kwargs={'username': 'author'})
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['users']), 20)
+        self.assertEqual(response.context['users'][0], self.readers[-1])
+        response = self.client.get(
+            url, {'before': response.context['next_before']}
+        )
+        self.assertEqual(len(response.context['users']), 5)
+        self.assertIsNone(response.context['next_before'])
+        response = self.client.get(
+            reverse('posts:following', kwargs={'username': 'reader0'})
+        )
+        self.assertEqual(response.context['users'], [self.author])
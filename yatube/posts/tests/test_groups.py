@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import group_stats
+from ..models import Group, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Б группа', slug='b-group', description='Описание'
+        )
+        cls.other = Group.objects.create(
+            title='А группа', slug='a-group', description='Описание'
+        )
+
+    def test_stats_follow_post_changes(self):
+        """Агрегаты меняются при создании, переносе и удалении постов."""
+        first = Post.objects.create(
+            author=self.user, text='Пост 1', group=self.group
+        )
+        Post.objects.create(author=self.user, text='Пост 2', group=self.group)
+        last = Post.objects.create(
+            author=self.author, text='Пост 3', group=self.group
+        )
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual((stats.posts_count, stats.authors_count), (3, 2))
+        self.assertEqual(stats.last_activity, last.pub_date)
+        last.delete()
+        stats.refresh_from_db()
+        self.assertEqual((stats.posts_count, stats.authors_count), (2, 1))
+        first.group = self.other
+        first.save()
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.other).posts_count, 1
+        )
+
+    def test_batch_counts_authors_in_one_query(self):
+        Post.objects.create(author=self.user, text='Старый', group=self.group)
+        authors = [self.user] + [
+            User.objects.create_user(username=f'author-{i}') for i in range(3)
+        ]
+        posts = [
+            Post.objects.create(author=author, text='Пост', group=self.group)
+            for author in authors
+        ]
+        # как будто в группе пока только старый пост
+        GroupStats.objects.filter(group=self.group).update(
+            posts_count=1, authors_count=1
+        )
+        with self.assertNumQueries(2):
+            group_stats.posts_added(posts)
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual((stats.posts_count, stats.authors_count), (5, 4))
+
+    def test_directory_keyset_pages(self):
+        for i in range(55):
+            Group.objects.create(
+                title=f'В группа {i:02}', slug=f'group-{i}', description='-'
+            )
+        response = self.client.get(reverse('posts:groups'))
+        groups = response.context['groups']
+        self.assertEqual(len(groups), 50)
+        self.assertEqual(groups[0], self.other)
+        response = self.client.get(
+            reverse('posts:groups'), {'after': response.context['next_cursor']}
+        )
+        self.assertEqual(len(response.context['groups']), 7)
+        self.assertIsNone(response.context['next_cursor'])
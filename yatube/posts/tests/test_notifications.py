@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.models import Task
+from ..models import Comment, Notification, Post
+from ..notifications import send_digests
+
+User = get_user_model()
+
+
+class NotificationDigestTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com'
+        )
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com'
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Пост автора')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_events_are_queued_not_sent(self):
+        """Подписка и комментарии не шлют писем, а ставят одну рассылку."""
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        for text in ('Первый', 'Второй'):
+            self.reader_client.post(
+                reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+                {'text': text},
+            )
+        Comment.objects.create(author=self.author, post=self.post, text='Я')
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_digest_per_recipient(self):
+        Notification.objects.create(
+            recipient=self.author, actor=self.reader,
+            kind=Notification.FOLLOW,
+        )
+        comment = Comment.objects.create(
+            author=self.reader, post=self.post, text='Отличный пост'
+        )
+        Notification.objects.create(
+            recipient=self.reader, actor=self.author,
+            kind=Notification.FOLLOW,
+        )
+        self.assertEqual(send_digests(batch_size=1), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        message = next(
+            message for message in mail.outbox
+            if message.to == ['author@example.com']
+        )
+        self.assertIn('Новые подписчики: reader', message.body)
+        self.assertIn(comment.text, message.body)
+        self.assertFalse(Notification.objects.filter(sent__isnull=True))
+        self.assertEqual(send_digests(), 0)
@@ -0,0 +1,72 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+from ..recommendations import recommendations_for
+
+User = get_user_model()
+
+
+class RecommendationsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user, cls.friend, cls.popular, cls.neighbour, cls.other = [
+            User.objects.create_user(username=name)
+            for name in ('auth', 'friend', 'popular', 'neighbour', 'other')
+        ]
+        Follow.objects.create(user=cls.user, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.popular)
+        group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=cls.user, text='Пост', group=group)
+        Post.objects.create(author=cls.neighbour, text='Пост', group=group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_friends_of_friends_and_group_neighbours(self):
+        """Рекомендуются друзья друзей, затем соседи по группам."""
+        call_command('build_recommendations', stdout=StringIO())
+        self.assertEqual(
+            recommendations_for(self.user),
+            [(self.popular.pk, 'popular'), (self.neighbour.pk, 'neighbour')],
+        )
+
+    def test_suggestions_rendered_from_table(self):
+        call_command('build_recommendations', stdout=StringIO())
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'На кого подписаться')
+        client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'popular'})
+        )
+        response = client.get(
+            reverse('posts:profile', kwargs={'username': 'other'})
+        )
+        self.assertEqual(
+            response.context['recommendations'],
+            [(self.neighbour.pk, 'neighbour')],
+        )
+
+    def test_emptied_suggestions_are_dropped(self):
+        call_command('build_recommendations', stdout=StringIO())
+        Follow.objects.filter(user=self.friend).delete()
+        Post.objects.filter(author=self.neighbour).delete()
+        call_command('build_recommendations', stdout=StringIO())
+        self.assertEqual(recommendations_for(self.user), [])
+
+    def test_expired_suggestions_are_hidden(self):
+        call_command(
+            'build_recommendations', '--ttl', '0', stdout=StringIO()
+        )
+        self.assertEqual(recommendations_for(self.user), [])
@@ -0,0 +1,74 @@
+import math
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import trending
+from ..models import Comment, Group, Post, TrendingScore
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.quiet = Post.objects.create(author=self.user, text='Тихий')
+        self.hot = Post.objects.create(
+            author=self.user, text='Обсуждаемый', group=self.group
+        )
+        for post, comments in ((self.quiet, 1), (self.hot, 3)):
+            for i in range(comments):
+                Comment.objects.create(
+                    author=self.user, post=post, text=f'Коммент {i}'
+                )
+
+    def test_popular_page_ranks_by_comments(self):
+        """Пост с большей активностью выше, группа попадает в топ."""
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(response.context['posts'], [self.hot, self.quiet])
+        self.assertEqual(response.context['groups'], [self.group])
+
+    def test_recent_activity_outweighs_old(self):
+        trending.add_events(
+            trending.POSTS_KEY,
+            [(self.quiet.pk, trending.time.time() + trending.DECAY * 2)],
+        )
+        self.assertEqual(
+            trending.top_ids(trending.POSTS_KEY)[0], self.quiet.pk
+        )
+
+    def test_events_accumulate_in_database(self):
+        """Каждое событие прибавляется к счёту одним UPDATE."""
+        moment = time.time()
+        for _ in range(2):
+            trending.add_events(trending.POSTS_KEY, [(10 ** 6, moment)])
+        score = TrendingScore.objects.get(
+            kind=trending.POSTS_KEY, item_id=10 ** 6
+        ).score
+        self.assertAlmostEqual(score, trending._weight(moment) + math.log(2))
+
+    def test_rebuild_command(self):
+        TrendingScore.objects.all().delete()
+        trending.add_events(trending.POSTS_KEY, [(10 ** 6, time.time())])
+        with mock.patch.object(trending, 'CAPACITY', 1):
+            call_command('update_trending', stdout=StringIO())
+        self.assertEqual(trending.top_ids(trending.POSTS_KEY), [self.hot.pk])
+        self.assertEqual(
+            TrendingScore.objects.filter(kind=trending.POSTS_KEY).count(), 1
+        )
@@ -65,6 +65,8 @@ class PostPagesTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        # Общие копии страниц из кэша не должны переходить между тестами
+        cache.clear()
         self.guest_client = Client()
         # Создаем авторизованный клиент
         self.authorized_client = Client()
@@ -276,6 +278,7 @@ class PaginatorViewsTest(TestCase):
         cls.pages = Post.objects.bulk_create(cls.page_obj)
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
 
     def test_first_page_contains_ten_records(self):
@@ -0,0 +1,122 @@
+import heapq
+import math
+import time
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Exp, Greatest, Least, Ln
+from django.utils import timezone
+
+from .models import Comment, Post, TrendingScore
+
+# Вклад события падает в e раз за DECAY секунд
+DECAY = 6 * 60 * 60
+TOP_K = 20
+# Столько строк оставляет rebuild, чтобы вытесненные снизу могли
+# вернуться в топ
+CAPACITY = TOP_K * 5
+POSTS_KEY = 'posts'
+GROUPS_KEY = 'groups'
+
+
+def _log_add(a, b):
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _weight(timestamp):
+    # Счёт хранится логарифмом суммы exp(t / DECAY): затухание
+    # не требует пересчёта, а свежие события весят больше старых
+    return timestamp / DECAY
+
+
+def _trim(scores):
+    return dict(heapq.nlargest(CAPACITY, scores.items(), key=lambda x: x[1]))
+
+
+def _merge(scores, events):
+    for item_id, timestamp in events:
+        scores[item_id] = _log_add(scores.get(item_id), _weight(timestamp))
+        if len(scores) > CAPACITY * 10:
+            scores = _trim(scores)
+    if len(scores) > CAPACITY:
+        scores = _trim(scores)
+    return scores
+
+
+def _add(kind, item_id, weight):
+    # _log_add одним UPDATE: одновременные события не затирают друг друга
+    weight = Value(weight, output_field=FloatField())
+    high = Greatest(F('score'), weight)
+    low = Least(F('score'), weight)
+    updated = TrendingScore.objects.filter(
+        kind=kind, item_id=item_id
+    ).update(score=high + Ln(1 + Exp(low - high)))
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            TrendingScore.objects.create(
+                kind=kind, item_id=item_id, score=weight.value
+            )
+    except IntegrityError:
+        # строку успел создать другой процесс
+        _add(kind, item_id, weight.value)
+
+
+def add_events(kind, events):
+    """events - пары (id, время в секундах); обновляет счёт по kind."""
+    for item_id, weight in _merge({}, events).items():
+        _add(kind, item_id, weight)
+
+
+def top_ids(kind, limit=TOP_K, now=None):
+    now = now or time.time()
+    # события старше нескольких DECAY уже ничего не весят
+    floor = _weight(now) - 10
+    return list(TrendingScore.objects.filter(
+        kind=kind, score__gt=floor
+    ).order_by('-score', 'item_id').values_list('item_id', flat=True)[:limit])
+
+
+def comments_added(comments):
+    now = time.time()
+    add_events(POSTS_KEY, [(comment.post_id, now) for comment in comments])
+
+
+def posts_added(posts):
+    now = time.time()
+    add_events(
+        GROUPS_KEY, [(post.group_id, now) for post in posts if post.group_id]
+    )
+
+
+def rebuild(days=3):
+    """Пересчитывает счёт по комментариям и постам за последние days дней.
+
+    Оставляет CAPACITY лучших строк каждого вида; запускать по cron, иначе
+    строки затухших постов и групп копятся.
+    """
+    since = timezone.now() - timedelta(days=days)
+    posts = _merge({}, (
+        (post_id, created.timestamp())
+        for post_id, created in Comment.objects.filter(
+            created__gte=since
+        ).values_list('post_id', 'created').iterator()
+    ))
+    groups = _merge({}, (
+        (group_id, pub_date.timestamp())
+        for group_id, pub_date in Post.objects.filter(
+            pub_date__gte=since, group__isnull=False
+        ).values_list('group_id', 'pub_date').iterator()
+    ))
+    with transaction.atomic():
+        for kind, scores in ((POSTS_KEY, posts), (GROUPS_KEY, groups)):
+            TrendingScore.objects.filter(kind=kind).delete()
+            TrendingScore.objects.bulk_create(
+                TrendingScore(kind=kind, item_id=item_id, score=score)
+                for item_id, score in scores.items()
+            )
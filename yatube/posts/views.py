@@ -4,14 +4,33 @@ from django.contrib.auth import get_user_model
 from django.core.paginator import Paginator
 from .forms import PostForm, CommentForm
 from django.contrib.auth.decorators import login_required
+from django.db.models import Q
+from django.http import HttpResponseForbidden, StreamingHttpResponse
+from . import (
+    comment_buffer, counts, events, export, feeds, following,
+    recommendations, trending
+)
+from .conditional import (
+    conditional_page, group_validators, index_validators, page_version,
+    popular_validators, post_validators, profile_validators
+)
+from .counts import ApproximatePaginator
+from core.holes import shared_page
+from core.ratelimit import ratelimit
 
 User = get_user_model()
 
+GROUPS_PER_PAGE = 50
+# Сколько живёт общая для всех пользователей копия ленты
+SHARED_PAGE_TIMEOUT = 20
 
+
+@conditional_page(group_validators)
+@shared_page(SHARED_PAGE_TIMEOUT, page_version(group_validators))
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, 10)
+    posts = feeds.group_feed(group)
+    paginator = ApproximatePaginator(posts, 10, counts.group_key(group.pk))
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
@@ -23,13 +42,15 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page(index_validators)
+@shared_page(SHARED_PAGE_TIMEOUT, page_version(index_validators))
 def index(request):
-    post_list = Post.objects.all()
+    post_list = feeds.index_feed()
     # Если порядок сортировки определен в классе Meta модели,
     # запрос будет выглядить так:
     # post_list = Post.objects.all()
     # Показывать по 10 записей на странице.
-    paginator = Paginator(post_list, 10)
+    paginator = ApproximatePaginator(post_list, 10, counts.INDEX_KEY)
 
     # Из URL извлекаем номер запрошенной страницы - это значение параметра page
     page_number = request.GET.get('page')
@@ -43,47 +64,123 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page(profile_validators)
 def profile(request, username):
     user = get_object_or_404(User, username=username)
-    posts = user.posts.all()
-    count = posts.count()
-    paginator = Paginator(posts, 10)
+    posts = feeds.profile_feed(user)
+    paginator = ApproximatePaginator(posts, 10, counts.author_key(user.pk))
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        author__following__user=request.user
-    ).exists()
+    count = paginator.count
+    is_following = user.pk in following.following_set(request.user)
+    followers_count, following_count = following.follow_counts(user)
     context = {
         'author': user,
         'posts': posts,
         'page_obj': page_obj,
         'count': count,
-        'following': following,
+        'count_approximate': paginator.approximate,
+        'following': is_following,
+        'followers_count': followers_count,
+        'following_count': following_count,
+        'recommendations': recommendations.recommendations_for(request.user),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def _follow_list(request, username, relation):
+    author = get_object_or_404(User, username=username)
+    if relation == 'followers':
+        queryset = Follow.objects.filter(author=author).select_related('user')
+    else:
+        queryset = Follow.objects.filter(user=author).select_related('author')
+    try:
+        before = int(request.GET.get('before', ''))
+    except ValueError:
+        before = None
+    follows, next_before = following.follow_page(queryset, before)
+    users = [
+        follow.user if relation == 'followers' else follow.author
+        for follow in follows
+    ]
+    context = {
+        'author': author,
+        'relation': relation,
+        'users': users,
+        'next_before': next_before,
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+def followers(request, username):
+    return _follow_list(request, username, 'followers')
+
+
+def following_list(request, username):
+    return _follow_list(request, username, 'following')
+
+
+@conditional_page(post_validators)
 def post_detail(request, post_id):
     post = get_object_or_404(Post.objects.select_related('author'), id=post_id)
     user = post.author_id
-    count = Post.objects.filter(author_id=user).count()
+    count, count_approximate = counts.approximate_count(
+        feeds.profile_feed(user), counts.author_key(user)
+    )
     comments = Comment.objects.filter(post_id=post_id)
+    pending_comments = comment_buffer.pending(post_id, request.user)
     form = CommentForm()
-    following = (
-        request.user.is_authenticated
-        and post.author.following.filter(user=request.user).exists()
-    )
+    is_following = user in following.following_set(request.user)
     context = {
         'post': post,
         'comments': comments,
+        'pending_comments': pending_comments,
         'count': count,
+        'count_approximate': count_approximate,
         'form': form,
-        'following': following,
+        'following': is_following,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def groups(request):
+    """Каталог групп по алфавиту с курсором (title, id) вместо OFFSET."""
+    group_list = Group.objects.select_related('stats').order_by('title', 'pk')
+    after = feeds.decode_group_cursor(request.GET.get('after'))
+    if after is not None:
+        title, pk = after
+        group_list = group_list.filter(
+            Q(title__gt=title) | Q(title=title, pk__gt=pk)
+        )
+    group_list = list(group_list[:GROUPS_PER_PAGE + 1])
+    next_cursor = None
+    if len(group_list) > GROUPS_PER_PAGE:
+        group_list = group_list[:GROUPS_PER_PAGE]
+        next_cursor = feeds.encode_group_cursor(group_list[-1])
+    context = {
+        'groups': group_list,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/groups.html', context)
+
+
+@shared_page(SHARED_PAGE_TIMEOUT, page_version(popular_validators))
+def popular(request):
+    """Популярное: посты и группы из готового топа, без агрегатов."""
+    post_ids = trending.top_ids(trending.POSTS_KEY)
+    group_ids = trending.top_ids(trending.GROUPS_KEY, limit=10)
+    posts = Post.objects.select_related('author', 'group').in_bulk(post_ids)
+    groups = Group.objects.in_bulk(group_ids)
+    context = {
+        'posts': [posts[pk] for pk in post_ids if pk in posts],
+        'groups': [groups[pk] for pk in group_ids if pk in groups],
+        'popular': True,
+    }
+    return render(request, 'posts/popular.html', context)
+
+
 @login_required
+@ratelimit('10/m')
 def post_create(request):
     group = Group.objects.all().order_by('-id')
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -119,9 +216,17 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('20/m')
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
+    if comment_buffer.enabled():
+        # пост проверяется при переносе в базу: здесь ни чтений, ни записи
+        if form.is_valid():
+            comment_buffer.append(
+                post_id, request.user, form.cleaned_data['text']
+            )
+        return redirect('posts:post_detail', post_id=post_id)
+    post = get_object_or_404(Post, id=post_id)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
@@ -132,7 +237,7 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = feeds.follow_feed(request.user)
     paginator = Paginator(posts, 10)
     page_number = request.GET.get('page')
 
@@ -141,16 +246,18 @@ def follow_index(request):
     # Отдаем в словаре контекста
     context = {
         'page_obj': page_obj,
-        'paginator': paginator
+        'paginator': paginator,
+        'recommendations': recommendations.recommendations_for(request.user),
     }
 
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('30/m', methods=('GET', 'POST'))
 def profile_follow(request, username):
     user = request.user
-    author = User.objects.get(username=username)
+    author = get_object_or_404(User, username=username)
     if author != user:
         Follow.objects.get_or_create(user=user, author=author)
         return redirect('posts:profile', username=username)
@@ -160,5 +267,37 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     user = request.user
-    Follow.objects.filter(user=user, author__username=username).delete()
+    author = get_object_or_404(User, username=username)
+    Follow.objects.filter(user=user, author=author).delete()
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def export_data(request):
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in export.FORMATS:
+        fmt = 'ndjson'
+    response = StreamingHttpResponse(
+        export.export_lines(fmt, user=request.user),
+        content_type=export.FORMATS[fmt],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{request.user.username}.{fmt}"'
+    )
+    return response
+
+
+def post_events(request):
+    """SSE-поток о новых постах; ?feed=follow - только от подписок."""
+    authors = None
+    if request.GET.get('feed') == 'follow':
+        if not request.user.is_authenticated:
+            return HttpResponseForbidden()
+        authors = feeds.follow_author_ids(request.user)
+    response = StreamingHttpResponse(
+        events.sse_stream(events.Subscription(authors)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,31 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+# Пользователь живёт в кэше, пока не изменится: сигналы из users.signals
+# удаляют его при любом сохранении, в том числе смене пароля и входе
+USER_TIMEOUT = 60 * 60
+
+
+def user_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    Только для общего кэша (settings.SHARED_CACHE): сброс из сигналов
+    должен доходить до всех процессов.
+    """
+
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_TIMEOUT)
+        return user
+
+
+def forget_user(user_id):
+    cache.delete(user_key(user_id))
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class AuthTestMixin:
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='auth', password='old-password'
+        )
+        self.client = Client()
+        self.client.login(username='auth', password='old-password')
+
+
+# В тестах один процесс, так что его LocMemCache ведёт себя как общий
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=['users.backends.CachedModelBackend'],
+)
+class CachedAuthTest(AuthTestMixin, TestCase):
+    def test_authenticated_request_without_auth_queries(self):
+        """Сессия и пользователь берутся из кэша: запросов к базе нет."""
+        url = reverse('about:author')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, 'Пользователь: auth')
+
+    def test_user_changes_invalidate_cache(self):
+        url = reverse('about:author')
+        self.client.get(url)
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertContains(self.client.get(url), 'Пользователь: renamed')
+
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'Войти')
+
+
+class DatabaseAuthTest(AuthTestMixin, TestCase):
+    """Без общего кэша сессия и пользователь читаются из базы."""
+
+    def test_changes_from_other_processes_apply_at_once(self):
+        url = reverse('about:author')
+        self.client.get(url)
+        # queryset.update() не шлёт сигналов - как правка из другого
+        # процесса, кэш которого недоступен
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertContains(self.client.get(url), 'Войти')
+
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+        self.assertContains(self.client.get(url), 'Пользователь: auth')
+        Session.objects.all().delete()
+        self.assertContains(self.client.get(url), 'Войти')
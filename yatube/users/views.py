@@ -1,8 +1,15 @@
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+
+from core.ratelimit import ratelimit
 from .forms import CreationForm
 
 
+signup_limit = ratelimit('5/h', keys=('ip',), name='signup')
+
+
+@method_decorator(signup_limit, name='dispatch')
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
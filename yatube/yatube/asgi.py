@@ -0,0 +1,22 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with any ASGI server, e.g. ``uvicorn yatube.asgi:application``.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+wsgi_application = get_wsgi_application()
+
+from core.asgi import AsgiBridge  # noqa: E402
+from posts import asgi as posts_asgi  # noqa: E402
+
+application = AsgiBridge(
+    wsgi_application,
+    routes={'/events/': posts_asgi.post_events},
+)
@@ -23,7 +23,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = '2(fe39-ulcog#cr*k9x1b8-dxxf_3im^o3f&0r01&p3_dnzqoj'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DJANGO_DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -50,24 +50,49 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.CompressionMiddleware',
+    # Сессия, пользователь и сообщения как в django.contrib, но анонимные
+    # GET/HEAD без cookie обходятся без них
+    'core.middleware.LazySessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.LazyAuthenticationMiddleware',
+    'core.middleware.LazyMessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.TemplateProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    # В продакшене шаблоны компилируются один раз на процесс
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
+# Прогрев: при старте компилируем все шаблоны из TEMPLATES_DIR
+TEMPLATE_WARMUP = not DEBUG
+# Ответы меньше этого размера не сжимаются: выигрыш меньше накладных
+COMPRESSION_MIN_SIZE = 512
+
+# Общий кэш страниц с личными фрагментами, которые заполняются на
+# каждый запрос (core.holes)
+SHARED_PAGE_CACHE = not DEBUG
+# Время рендера каждого шаблона в лог и заголовок Server-Timing
+TEMPLATE_PROFILING = os.getenv('TEMPLATE_PROFILING') == 'True'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -81,6 +106,34 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Общий для всех процессов кэш - memcached по адресу CACHE_LOCATION
+# (нужен пакет python-memcached). Без него у каждого процесса свой
+# LocMemCache, и сброс в одном процессе не виден в других
+CACHE_LOCATION = os.getenv('CACHE_LOCATION')
+SHARED_CACHE = bool(CACHE_LOCATION)
+if SHARED_CACHE:
+    # Сессия читается из кэша, в базу пишется при изменении; пользователь
+    # сессии тоже берётся из кэша, так что запрос обходится без запросов
+    # к базе на аутентификацию. В кэше процесса их держать нельзя:
+    # выход, смена пароля или блокировка не дошли бы до других процессов
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+
+# До этого числа записей ленты считаются точно, выше - по счётчикам
+EXACT_COUNT_LIMIT = 1000
+
+# Размер пула потоков, в котором yatube.asgi выполняет WSGI-запросы
+ASGI_THREADS = 16
+
+# Очередь задач core.Task выполняет manage.py runworker; при True
+# задачи выполняются сразу при постановке
+TASKS_EAGER = os.getenv('TASKS_EAGER', 'False') == 'True'
+
+# Отложенная запись комментариев: add_comment дописывает их в журнал,
+# в базу их переносит manage.py flush_comments (posts.comment_buffer)
+COMMENT_BUFFER = os.getenv('COMMENT_BUFFER') == 'True'
+COMMENT_BUFFER_DIR = os.path.join(BASE_DIR, 'comment_buffer')
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -134,11 +187,25 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Стили, из которых collectstatic вырезает классы, не встречающиеся
+# в шаблонах проекта
+STATIC_PURGE_CSS = ['css/bootstrap.min.css']
+
+if not DEBUG:
+    # Имена с хэшем содержимого и сжатые копии .gz/.br собираются один
+    # раз в collectstatic, отдаёт их core.staticfiles.serve
+    STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStorage'
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+# Раз в столько секунд пользователям уходит письмо со всеми новыми
+# подписчиками и комментариями (posts.notifications)
+DIGEST_INTERVAL = 15 * 60
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -147,3 +214,8 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+if SHARED_CACHE:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': CACHE_LOCATION,
+    }